@@ -0,0 +1,187 @@
+import argparse
+import random
+import time
+from harness.engine import LETTERS, Session
+from harness.stats import Histogram
+from harness.wheel import TimingWheel
+
+class Game:
+    __slots__ = ('session', 'generation', 'turn_started', 'action',
+                 'deadline', 'disconnects', 'max_stall')
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.generation = 0
+        self.turn_started = 0.0
+        self.action = None
+        self.deadline = None
+        self.disconnects = []
+        self.max_stall = 0.0
+
+class AfkSimulation:
+    """Simulated players thinking, going AFK and disconnecting mid-game.
+
+    Every session runs the reference model from harness/engine.py. The
+    current player acts after an exponential think time with mean
+    `think`. With probability `afk_rate` they go AFK and stall for a
+    further `afk` seconds on average. Each player also disconnects at
+    `disconnect_rate` per second, which goes through remove_player and
+    from there _kill_player. With `timeout` set, a turn that runs that
+    long is skipped, as a server-side turn timeout would do. Finished
+    games restart with fresh players, so the population stays constant.
+
+    All timers live in one TimingWheel, so the cost per event stays flat
+    however many players are simulated. The stall of a turn is the time
+    from its start to the action, skip or disconnect that ended it.
+    """
+
+    def __init__(self, players: int=100000, per_session: int=4,
+                 think: float=5.0, afk_rate: float=0.02, afk: float=120.0,
+                 disconnect_rate: float=1 / 3600, timeout: float=None,
+                 tick: float=0.05, seed: int=None):
+        self.per_session = per_session
+        self.think = think
+        self.afk_rate = afk_rate
+        self.afk = afk
+        self.disconnect_rate = disconnect_rate
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.wheel = TimingWheel(tick)
+        self.stalls = Histogram()
+        self.session_max_stalls = Histogram()
+        self.turns = 0
+        self.timeouts = 0
+        self.disconnected = 0
+        self.games = 0
+        self.peak_timers = 0
+        self.next_pid = 0
+        self.sessions = [Game(Session(str(i), self.random.getrandbits(32)))
+                         for i in range(players // per_session)]
+
+    def start(self):
+        for game in self.sessions:
+            self.new_game(game)
+        return self
+
+    def new_game(self, game: Game):
+        for timer in game.disconnects:
+            self.wheel.cancel(timer)
+        game.disconnects = []
+        game.generation += 1
+        session = game.session
+        session.reset()
+        for _ in range(self.per_session):
+            pid = str(self.next_pid)
+            self.next_pid += 1
+            session.add_player(pid, pid)
+            if self.disconnect_rate:
+                game.disconnects.append(self.wheel.schedule(
+                    self.random.expovariate(self.disconnect_rate),
+                    self.disconnect, game, pid, game.generation))
+        for pid in list(session.players):
+            word = ''.join(self.random.choice(LETTERS) for _ in range(self.random.randint(4, 8)))
+            session.set_player_word(pid, word)
+        self.begin_turn(game)
+
+    def begin_turn(self, game: Game):
+        game.turn_started = self.wheel.time
+        delay = self.random.expovariate(1 / self.think)
+        if self.random.random() < self.afk_rate:
+            delay += self.random.expovariate(1 / self.afk)
+        game.action = self.wheel.schedule(delay, self.act, game)
+        if self.timeout is not None:
+            game.deadline = self.wheel.schedule(self.timeout, self.time_out, game)
+        self.peak_timers = max(self.peak_timers, self.wheel.pending)
+
+    def end_turn(self, game: Game):
+        stall = self.wheel.time - game.turn_started
+        self.stalls.add(stall)
+        game.max_stall = max(game.max_stall, stall)
+        self.turns += 1
+        self.wheel.cancel(game.action)
+        if game.deadline is not None:
+            self.wheel.cancel(game.deadline)
+            game.deadline = None
+        if game.session.check_game_over():
+            self.games += 1
+            self.session_max_stalls.add(game.max_stall)
+            game.max_stall = 0.0
+            self.new_game(game)
+        else:
+            self.begin_turn(game)
+
+    def act(self, game: Game):
+        session = game.session
+        unguessed = [c for c in LETTERS if not session.alphabet.did_set(c)]
+        if unguessed:
+            session.guess_letter(self.random.choice(unguessed))
+        else:
+            session.skip_turn()
+        self.end_turn(game)
+
+    def time_out(self, game: Game):
+        game.deadline = None
+        self.timeouts += 1
+        game.session.skip_turn()
+        self.end_turn(game)
+
+    def disconnect(self, game: Game, pid: str, generation: int):
+        session = game.session
+        if generation != game.generation or not session.players[pid].alive:
+            return
+        self.disconnected += 1
+        current = session.current_pid() == pid
+        session.remove_player(pid)
+        if current or session.check_game_over():
+            self.end_turn(game)
+
+    def run(self, duration: float):
+        start = time.perf_counter()
+        self.wheel.advance(duration)
+        # Sessions still mid-game count with the worst stall seen so far
+        for game in self.sessions:
+            self.session_max_stalls.add(max(game.max_stall, self.wheel.time - game.turn_started))
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed: float):
+        return {'sessions': len(self.sessions),
+                'players': len(self.sessions) * self.per_session,
+                'simulated': self.wheel.time,
+                'elapsed': elapsed,
+                'turns': self.turns,
+                'games': self.games,
+                'timeouts': self.timeouts,
+                'disconnects': self.disconnected,
+                'peak_timers': self.peak_timers,
+                'stalls': self.stalls.summarize(),
+                'session_max_stalls': self.session_max_stalls.summarize()}
+
+def print_report(r: dict, timeout: float=None):
+    print(f'{r["players"]} players in {r["sessions"]} sessions, '
+          f'{r["simulated"]:.0f}s simulated in {r["elapsed"]:.1f}s '
+          f'({r["turns"] / r["elapsed"]:.0f} turns/s, peak {r["peak_timers"]} timers)')
+    print(f'{r["turns"]} turns, {r["games"]} games, {r["disconnects"]} disconnects, '
+          f'{r["timeouts"]} timeouts' + (f' at {timeout}s' if timeout else ''))
+    for name, key in (('turn stall', 'stalls'), ('worst stall per session', 'session_max_stalls')):
+        s = r[key]
+        print(f'{name:<24} mean {s["mean"]:7.1f}s  p50 {s["p50"]:7.1f}s  '
+              f'p90 {s["p90"]:7.1f}s  p99 {s["p99"]:7.1f}s  max {s["max"]:7.1f}s')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate AFK players and measure turn stalls')
+    parser.add_argument('--players', type=int, default=100000)
+    parser.add_argument('--per-session', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=600, help='simulated seconds')
+    parser.add_argument('--think', type=float, default=5.0, help='mean think time in seconds')
+    parser.add_argument('--afk-rate', type=float, default=0.02, help='chance a turn goes AFK')
+    parser.add_argument('--afk', type=float, default=120.0, help='mean AFK stall in seconds')
+    parser.add_argument('--disconnect-rate', type=float, default=1 / 3600,
+                        help='disconnects per player per second')
+    parser.add_argument('--timeout', type=float, help='turn timeout to evaluate, in seconds')
+    parser.add_argument('--tick', type=float, default=0.05)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    simulation = AfkSimulation(args.players, args.per_session, args.think, args.afk_rate,
+                               args.afk, args.disconnect_rate, args.timeout,
+                               args.tick, args.seed).start()
+    print_report(simulation.run(args.duration), args.timeout)
@@ -0,0 +1,107 @@
+import asyncio
+import aiohttp
+from harness.client import DEFAULT_URL, check_payload, summarize_state
+
+async def check_response(res: aiohttp.ClientResponse,
+                         content_type: str=None):
+    body = await res.read()
+    if content_type is None:
+        if 'Content-Type' in res.headers:
+            raise ValueError(f'unexpected content type {res.headers["Content-Type"]}')
+        return None
+    if res.headers.get('Content-Type') != content_type + '; charset=utf-8':
+        raise ValueError(f'expected {content_type}, got {res.headers.get("Content-Type")}')
+    if len(body) == 0:
+        raise ValueError('empty response body')
+    if content_type == 'text/html':
+        return body.decode('utf-8')
+    elif content_type == 'application/json':
+        return await res.json()
+    raise ValueError()
+
+class AsyncHangmenClient:
+    """asyncio counterpart of HangmenClient.
+
+    Every request shares one aiohttp session whose connector caps the
+    number of open connections at pool_size.
+    """
+
+    def __init__(self, base_url: str=DEFAULT_URL,
+                 pool_size: int=100, timeout: float=None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=self.timeout)
+
+    async def post(self, post_type: str, json: dict=None):
+        # Raw round trip, returns the status and body without checks
+        async with self.session.post(f'{self.base_url}/{post_type}',
+                                     json=json) as res:
+            return res.status, await res.read()
+
+    async def request(self, post_type: str, json: dict=None):
+        content_type = check_payload(post_type, json)
+        async with self.session.post(f'{self.base_url}/{post_type}',
+                                     json=json) as res:
+            return await check_response(res, content_type)
+
+    async def new_session(self):
+        return await self.request('new-session')
+
+    async def join_session(self, sid: str, name: str):
+        return await self.request('join-session', {'sid': sid, 'name': name})
+
+    async def get_state(self, sid: str):
+        return await self.request('get-state', {'sid': sid})
+
+    async def get_states(self, sids, concurrency: int=100,
+                         timeout: float=2.0, summary: bool=False):
+        # Same contract as HangmenClient.get_states, as an async generator
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(sid):
+            async with semaphore:
+                try:
+                    state = await asyncio.wait_for(self.get_state(sid), timeout)
+                except Exception as e:
+                    return sid, None, e
+            return sid, summarize_state(state) if summary else state, None
+
+        tasks = [asyncio.ensure_future(fetch(sid)) for sid in sids]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def set_word(self, sid: str, pid: str, word: str):
+        return await self.request('set-word', {'sid': sid, 'pid': pid, 'word': word})
+
+    async def guess_letter(self, sid: str, letter: str):
+        return await self.request('guess-letter', {'sid': sid, 'letter': letter})
+
+    async def guess_word(self, sid: str, pid: str, word: str):
+        return await self.request('guess-word', {'sid': sid, 'pid': pid, 'word': word})
+
+    async def exit_session(self, sid: str, pid: str):
+        return await self.request('exit-session', {'sid': sid, 'pid': pid})
+
+    async def reset_session(self, sid: str):
+        return await self.request('reset-session', {'sid': sid})
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
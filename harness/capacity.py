@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import json
+import random
+import string
+import sys
+import time
+from collections import defaultdict, deque
+from harness.aioclient import AsyncHangmenClient
+from harness.client import DEFAULT_URL
+from harness.loadgen import WORDS
+from harness.stats import Histogram
+
+def arrivals(rate: float, duration: float, process: str='poisson', rng: random.Random=None):
+    # Offsets in seconds at which requests are due
+    rng = rng or random.Random()
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate) if process == 'poisson' else 1 / rate
+        if t >= duration:
+            return
+        yield t
+
+class Game:
+    __slots__ = ('sid', 'pids', 'words', 'guessed', 'step', 'slot')
+
+    def __init__(self):
+        self.sid = None
+        self.pids = []
+        self.words = []
+        self.guessed = set()
+        self.step = 0
+        # Index in Workload.started once it has a session
+        self.slot = None
+
+class Workload:
+    """Game actions in the order test.py plays them.
+
+    A game goes new-session, join-session per player, set-word per player,
+    then `plays` actions drawn from `mix`. Each game has one action in
+    flight at a time, like a single client would. Arrivals are never held
+    back: when no game is ready for its next action, a new game starts.
+    With max_games, once that many games are open an arrival with no
+    ready game reads the state of a busy one instead.
+    """
+
+    def __init__(self, players: int=3, plays: int=30, mix: dict=None,
+                 rng: random.Random=None, max_games: int=None):
+        self.players = players
+        self.plays = plays
+        self.mix = mix or {'guess-letter': 0.5, 'get-state': 0.3, 'guess-word': 0.2}
+        self.random = rng or random.Random()
+        self.max_games = max_games
+        self.ready = deque()
+        # Open games, and those of them with a session. started is a list
+        # for random.choice; drop() swaps the last game into the gap
+        self.games = set()
+        self.started = []
+
+    def next(self):
+        if self.ready:
+            game = self.ready.popleft()
+        elif self.max_games and len(self.games) >= self.max_games and self.started:
+            # Extra reads are not part of any game's sequence
+            return None, 'get-state', {'sid': self.random.choice(self.started).sid}
+        else:
+            game = Game()
+            self.games.add(game)
+        p = self.players
+        if game.step == 0:
+            return game, 'new-session', None
+        if game.step <= p:
+            return game, 'join-session', {'sid': game.sid, 'name': f'name{game.step}'}
+        if game.step <= 2 * p:
+            i = game.step - p - 1
+            word = self.random.choice(WORDS)
+            game.words.append(word)
+            return game, 'set-word', {'sid': game.sid, 'pid': game.pids[i], 'word': word}
+        action = self.random.choices(list(self.mix), list(self.mix.values()))[0]
+        if action == 'guess-letter':
+            letters = [c for c in string.ascii_lowercase if c not in game.guessed]
+            letter = self.random.choice(letters or string.ascii_lowercase)
+            game.guessed.add(letter)
+            return game, action, {'sid': game.sid, 'letter': letter}
+        if action == 'guess-word':
+            i = self.random.randrange(p)
+            word = game.words[i] if self.random.random() < 0.3 else self.random.choice(WORDS)
+            return game, action, {'sid': game.sid, 'pid': game.pids[i], 'word': word}
+        return game, action, {'sid': game.sid}
+
+    def done(self, game: Game, post_type: str, result):
+        if game is None:
+            return
+        if post_type == 'new-session':
+            game.sid = result
+            game.slot = len(self.started)
+            self.started.append(game)
+        elif post_type == 'join-session':
+            game.pids.append(result)
+        game.step += 1
+        if game.step <= 2 * self.players + self.plays:
+            self.ready.append(game)
+        else:
+            self.drop(game)
+
+    def drop(self, game: Game):
+        # Finished, or abandoned after a failed action
+        if game is None or game not in self.games:
+            return
+        self.games.discard(game)
+        if game.slot is not None:
+            last = self.started.pop()
+            if last is not game:
+                self.started[game.slot] = last
+                last.slot = game.slot
+            game.slot = None
+
+class OpenLoop:
+    """Sends workload actions on a fixed arrival schedule.
+
+    Requests go out when they are due, however many are still waiting for
+    an answer, and latency is counted from the scheduled time rather than
+    from the actual send. A slow server therefore shows up as queueing in
+    the latencies instead of as a lower send rate (coordinated omission).
+    service_time is the plain send-to-answer time, and send_lag is how
+    late sends left; a large lag means this client, not the server, is
+    the bottleneck.
+    """
+
+    def __init__(self, client: AsyncHangmenClient, workload: Workload):
+        self.client = client
+        self.workload = workload
+        self.latency = defaultdict(Histogram)
+        self.service_time = defaultdict(Histogram)
+        self.send_lag = Histogram()
+        self.sent = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.measure_from = 0.0
+        self.stopping = False
+
+    async def fire(self, scheduled: float):
+        game, post_type, payload = self.workload.next()
+        sent = time.perf_counter()
+        self.send_lag.add(sent - scheduled)
+        try:
+            result = await self.client.request(post_type, payload)
+        except asyncio.CancelledError:
+            # Still unanswered when the run ended
+            if scheduled >= self.measure_from:
+                self.timeouts += 1
+                self.latency['all'].add(time.perf_counter() - scheduled)
+            self.workload.drop(game)
+            raise
+        except Exception:
+            self.errors += 1
+            self.workload.drop(game)
+            return
+        done = time.perf_counter()
+        if scheduled >= self.measure_from:
+            self.latency[post_type].add(done - scheduled)
+            self.latency['all'].add(done - scheduled)
+            self.service_time[post_type].add(done - sent)
+        self.workload.done(game, post_type, result)
+
+    async def run(self, schedule, warmup: float=0.0, drain: float=10.0):
+        start = time.perf_counter()
+        self.measure_from = start + warmup
+        tasks = set()
+        for offset in schedule:
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.stopping:
+                break
+            task = asyncio.ensure_future(self.fire(due))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            self.sent += 1
+        elapsed = time.perf_counter() - start
+        if tasks:
+            _, pending = await asyncio.wait(set(tasks), timeout=drain)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return elapsed
+
+    def stop(self):
+        # Send nothing more; run() drains what is in flight and returns
+        self.stopping = True
+
+async def probe(client: AsyncHangmenClient, rate: float, duration: float,
+                slo: float, warmup: float=2.0, process: str='poisson',
+                error_budget: float=0.001, seed: int=None, players: int=3):
+    """One open-loop run at `rate` actions/s; ok when p99 <= slo and
+    errors plus timeouts stay within error_budget of the measured sends."""
+    rng = random.Random(seed)
+    loop = OpenLoop(client, Workload(players, rng=rng))
+    elapsed = await loop.run(arrivals(rate, warmup + duration, process, rng),
+                             warmup, drain=max(10 * slo, 5.0))
+    overall = loop.latency['all'].summarize()
+    measured = max(overall['count'], 1)
+    failed = loop.errors + loop.timeouts
+    return {'rate': rate,
+            'sent': loop.sent,
+            'achieved': loop.sent / elapsed,
+            'errors': loop.errors,
+            'timeouts': loop.timeouts,
+            'p50': overall['p50'], 'p99': overall['p99'],
+            'p999': overall['p999'], 'max': overall['max'],
+            'send_lag_p99': loop.send_lag.quantile(99),
+            'endpoints': {e: h.summarize() for e, h in loop.latency.items() if e != 'all'},
+            'ok': overall['count'] > 0 and overall['p99'] <= slo
+                  and failed <= error_budget * measured}
+
+async def find_capacity(client: AsyncHangmenClient, slo: float, start_rate: float=50,
+                        max_rate: float=1e5, precision: float=0.05, min_rate: float=1.0,
+                        report=None, **kwargs):
+    """Highest rate whose p99 stays within slo.
+
+    Doubles the rate from start_rate until a probe fails, then bisects
+    between the last passing and first failing rate until they are within
+    `precision` of each other. When nothing passes, the search gives up
+    with 0 once the failing rate is below min_rate, rather than halving
+    towards zero forever against a server that is down or erroring.
+    """
+    probes = []
+
+    async def run(rate):
+        r = await probe(client, rate, slo=slo, **kwargs)
+        probes.append(r)
+        if report:
+            report(r)
+        return r['ok']
+
+    good, bad, rate = 0.0, None, start_rate
+    while bad is None:
+        if await run(rate):
+            good = rate
+            if rate >= max_rate:
+                return good, probes
+            rate = min(rate * 2, max_rate)
+        else:
+            bad = rate
+    while bad - good > precision * bad:
+        if good == 0 and bad < min_rate:
+            return 0.0, probes
+        rate = (good + bad) / 2
+        if await run(rate):
+            good = rate
+        else:
+            bad = rate
+    return good, probes
+
+def print_probe(r: dict):
+    flag = 'ok' if r['ok'] else 'FAIL'
+    print(f'{r["rate"]:9.1f}/s sent {r["sent"]:>7} p50 {r["p50"] * 1e3:8.2f} ms '
+          f'p99 {r["p99"] * 1e3:8.2f} ms max {r["max"] * 1e3:8.1f} ms '
+          f'errors {r["errors"]} timeouts {r["timeouts"]} '
+          f'lag p99 {r["send_lag_p99"] * 1e3:.1f} ms {flag}', flush=True)
+
+async def main(args):
+    async with AsyncHangmenClient(args.url, pool_size=args.connections,
+                                  timeout=args.timeout) as client:
+        common = {'duration': args.duration, 'warmup': args.warmup,
+                  'process': args.process, 'seed': args.seed,
+                  'players': args.players}
+        slo = args.slo / 1e3
+        if args.ramp:
+            rates = [float(r) for r in args.ramp.split(',')]
+            probes = []
+            for rate in rates:
+                r = await probe(client, rate, slo=slo, **common)
+                print_probe(r)
+                probes.append(r)
+            passing = [r['rate'] for r in probes if r['ok']]
+            capacity = max(passing) if passing else 0.0
+        else:
+            capacity, probes = await find_capacity(client, slo, args.start_rate,
+                                                   args.max_rate, args.precision,
+                                                   args.min_rate, report=print_probe,
+                                                   **common)
+    label = f'capacity{f" of {args.build}" if args.build else ""}'
+    if capacity:
+        print(f'{label}: {capacity:.1f} actions/s with p99 <= {args.slo:g} ms')
+    else:
+        print(f'{label}: no probed rate met p99 <= {args.slo:g} ms within the error budget')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'build': args.build, 'slo_ms': args.slo, 'capacity': capacity,
+                       'probes': probes}, f, indent=2)
+    return capacity
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find the highest rate a server sustains within a p99 SLO')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--slo', type=float, default=50, help='p99 target in ms')
+    parser.add_argument('--start-rate', type=float, default=50, help='actions/s of the first probe')
+    parser.add_argument('--max-rate', type=float, default=1e5)
+    parser.add_argument('--min-rate', type=float, default=1.0,
+                        help='report 0 when even this rate fails')
+    parser.add_argument('--precision', type=float, default=0.05)
+    parser.add_argument('--ramp', help='comma-separated rates to step through instead of searching')
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds per probe')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds per probe')
+    parser.add_argument('--process', choices=['poisson', 'uniform'], default='poisson')
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--build', help='server build label for the report')
+    parser.add_argument('--json', help='also write the probes here')
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args)) > 0 else 1)
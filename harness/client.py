@@ -0,0 +1,211 @@
+import os
+import time
+import requests
+from json import dumps
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from harness.stats import Histogram
+from harness.tracing import span
+
+DEFAULT_URL = os.environ.get('HANGMEN_URL', 'http://localhost:3000')
+
+# Content type of each endpoint's response (None: empty body)
+CONTENT_TYPES = {
+    'new-session': 'text/html',
+    'join-session': 'text/html',
+    'get-state': 'application/json',
+    'set-word': None,
+    'guess-letter': None,
+    'guess-word': None,
+    'exit-session': None,
+    'reset-session': None,
+}
+
+# Fields required in each endpoint's payload (None: no payload)
+PAYLOAD_FIELDS = {
+    'new-session': None,
+    'join-session': ('sid', 'name'),
+    'get-state': ('sid',),
+    'set-word': ('sid', 'pid', 'word'),
+    'guess-letter': ('sid', 'letter'),
+    'guess-word': ('sid', 'pid', 'word'),
+    'exit-session': ('sid', 'pid'),
+    'reset-session': ('sid',),
+}
+
+def check_payload(post_type: str, json: dict=None):
+    if post_type not in PAYLOAD_FIELDS:
+        raise ValueError(f'unknown endpoint {post_type}')
+    fields = PAYLOAD_FIELDS[post_type]
+    if fields is None:
+        assert(json is None)
+    else:
+        assert(json is not None and all(f in json for f in fields))
+    return CONTENT_TYPES[post_type]
+
+def encode_payload(json: dict=None):
+    # Request body as requests would encode json=, None without a payload
+    return None if json is None else dumps(json).encode()
+
+def check_response(res: requests.Response,
+                   content_type: str=None):
+    if content_type is None:
+        if 'Content-Type' in res.headers:
+            raise ValueError(f'unexpected content type {res.headers["Content-Type"]}')
+        return None
+    if res.headers.get('Content-Type') != content_type + '; charset=utf-8':
+        raise ValueError(f'expected {content_type}, got {res.headers.get("Content-Type")}')
+    if len(res.text) == 0:
+        raise ValueError('empty response body')
+    if content_type == 'text/html':
+        return res.text
+    elif content_type == 'application/json':
+        return res.json()
+    raise ValueError()
+
+def summarize_state(state: dict):
+    # Compact view of a session for monitoring
+    players = state['players'].values()
+    return {'isLobby': state['isLobby'],
+            'players': len(players),
+            'alive': sum(1 for p in players if p['alive']),
+            'guessed': sum(1 for v in state['alphabet']['letters'].values() if v)}
+
+class StateTimeout(TimeoutError):
+
+    def __init__(self, sid: str, state: dict, timeout: float):
+        super().__init__(f'state of {sid} did not converge in {timeout}s')
+        self.state = state
+
+def poll_state(get_state, sid: str, predicate,
+               timeout: float=1.0, interval: float=0.001,
+               max_interval: float=0.05):
+    # Poll until predicate holds, doubling the delay between polls.
+    # Returns the matching state and how long convergence took.
+    start = time.perf_counter()
+    delay = interval
+    while True:
+        state = get_state(sid)
+        elapsed = time.perf_counter() - start
+        if predicate(state):
+            return state, elapsed
+        if elapsed >= timeout:
+            raise StateTimeout(sid, state, timeout)
+        time.sleep(min(delay, timeout - elapsed))
+        delay = min(delay * 2, max_interval)
+
+class HangmenClient:
+    """Keep-alive client for the server's POST endpoints.
+
+    All requests go through one pooled requests.Session, so consecutive
+    actions reuse connections instead of paying a handshake each.
+    """
+
+    def __init__(self, base_url: str=DEFAULT_URL,
+                 pool_size: int=10, timeout: float=None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # How long wait_for_state took to see the state it waited for,
+        # and how many waits gave up
+        self.convergence = Histogram()
+        self.convergence_timeouts = 0
+        # Called as observer(post_type, json, res, start, latency) after each post
+        self.observers = []
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, post_type: str, json: dict=None, timeout: float=None,
+             body: bytes=None):
+        # Raw round trip, no payload or response checks. body is json
+        # already encoded by encode_payload; observers still get json.
+        start = time.perf_counter()
+        if body is None:
+            res = self.session.post(f'{self.base_url}/{post_type}', json=json,
+                                    timeout=timeout or self.timeout)
+        else:
+            res = self.session.post(f'{self.base_url}/{post_type}', data=body,
+                                    headers={'Content-Type': 'application/json'},
+                                    timeout=timeout or self.timeout)
+        latency = time.perf_counter() - start
+        for observer in self.observers:
+            observer(post_type, json, res, start, latency)
+        return res
+
+    def request(self, post_type: str, json: dict=None):
+        with span(post_type, sid=json and json.get('sid')):
+            content_type = check_payload(post_type, json)
+            with span('network'):
+                res = self.post(post_type, json)
+            with span('decode'):
+                return check_response(res, content_type)
+
+    def new_session(self):
+        return self.request('new-session')
+
+    def join_session(self, sid: str, name: str):
+        return self.request('join-session', {'sid': sid, 'name': name})
+
+    def get_state(self, sid: str):
+        return self.request('get-state', {'sid': sid})
+
+    def get_states(self, sids, concurrency: int=None,
+                   timeout: float=2.0, summary: bool=False):
+        """Fetch many sessions at once, yielding (sid, state, error) as each
+        one answers.
+
+        At most `concurrency` fetches run at a time (default: the pool
+        size), each bounded by `timeout`. A failed fetch yields its error
+        instead of raising, so one bad session does not hide the others.
+        With summary, states are reduced by summarize_state.
+        """
+        def fetch(sid):
+            try:
+                res = self.post('get-state', {'sid': sid}, timeout=timeout)
+                state = check_response(res, CONTENT_TYPES['get-state'])
+            except Exception as e:
+                return sid, None, e
+            return sid, summarize_state(state) if summary else state, None
+
+        pool = ThreadPoolExecutor(concurrency or self.pool_size)
+        try:
+            futures = [pool.submit(fetch, sid) for sid in sids]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def set_word(self, sid: str, pid: str, word: str):
+        return self.request('set-word', {'sid': sid, 'pid': pid, 'word': word})
+
+    def guess_letter(self, sid: str, letter: str):
+        return self.request('guess-letter', {'sid': sid, 'letter': letter})
+
+    def guess_word(self, sid: str, pid: str, word: str):
+        return self.request('guess-word', {'sid': sid, 'pid': pid, 'word': word})
+
+    def exit_session(self, sid: str, pid: str):
+        return self.request('exit-session', {'sid': sid, 'pid': pid})
+
+    def reset_session(self, sid: str):
+        return self.request('reset-session', {'sid': sid})
+
+    def wait_for_state(self, sid: str, predicate, timeout: float=1.0):
+        try:
+            state, elapsed = poll_state(self.get_state, sid, predicate, timeout)
+        except StateTimeout:
+            self.convergence_timeouts += 1
+            raise
+        self.convergence.add(elapsed)
+        return state
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from harness.aioclient import AsyncHangmenClient
+from harness.capacity import OpenLoop, Workload, arrivals
+from harness.client import DEFAULT_URL
+from harness.server import ROOT
+from harness.stats import Histogram
+
+# Control messages are one JSON object per line
+
+async def send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+
+async def receive(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError('control connection closed')
+    return json.loads(line)
+
+def split(total: int, n: int):
+    # total in n parts that differ by at most one
+    return [total // n + (i < total % n) for i in range(n)]
+
+class Results:
+    """Counters and histograms of an open-loop run.
+
+    Everything in here adds up, so the deltas workers send merge into
+    exactly what one process sending all the load would have recorded.
+    """
+
+    COUNTERS = ('sent', 'errors', 'timeouts')
+
+    def __init__(self):
+        self.latency = defaultdict(Histogram)
+        self.service_time = defaultdict(Histogram)
+        self.send_lag = Histogram()
+        self.sent = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def merge(self, other: 'Results'):
+        for endpoint, h in other.latency.items():
+            self.latency[endpoint].merge(h)
+        for endpoint, h in other.service_time.items():
+            self.service_time[endpoint].merge(h)
+        self.send_lag.merge(other.send_lag)
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def to_dict(self):
+        return {'latency': {e: h.to_dict() for e, h in self.latency.items()},
+                'service_time': {e: h.to_dict() for e, h in self.service_time.items()},
+                'send_lag': self.send_lag.to_dict(),
+                **{name: getattr(self, name) for name in self.COUNTERS}}
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        results = cls()
+        for endpoint, h in d['latency'].items():
+            results.latency[endpoint] = Histogram.from_dict(h)
+        for endpoint, h in d['service_time'].items():
+            results.service_time[endpoint] = Histogram.from_dict(h)
+        results.send_lag = Histogram.from_dict(d['send_lag'])
+        for name in cls.COUNTERS:
+            setattr(results, name, d[name])
+        return results
+
+def take(loop: OpenLoop, taken: dict):
+    # What loop recorded since the last take. The loop carries on with
+    # empty histograms; taken holds the counters already handed out.
+    results = Results()
+    results.latency, loop.latency = loop.latency, defaultdict(Histogram)
+    results.service_time, loop.service_time = loop.service_time, defaultdict(Histogram)
+    results.send_lag, loop.send_lag = loop.send_lag, Histogram()
+    for name in Results.COUNTERS:
+        now = getattr(loop, name)
+        setattr(results, name, now - taken.get(name, 0))
+        taken[name] = now
+    return results
+
+async def work(host: str, port: int, name: str=None):
+    """One worker: take a plan from the coordinator, send its share of the
+    load from the agreed start time and stream results back."""
+    reader, writer = await asyncio.open_connection(host, port)
+    await send(writer, {'type': 'hello',
+                        'worker': name or f'{socket.gethostname()}:{os.getpid()}'})
+    plan = await receive(reader)
+    rng = random.Random(plan['seed'])
+    async with AsyncHangmenClient(plan['url'], pool_size=plan['connections'],
+                                  timeout=plan['timeout']) as client:
+        loop = OpenLoop(client, Workload(plan['players'], rng=rng,
+                                         max_games=plan['sessions'] or None))
+        await send(writer, {'type': 'ready'})
+        message = await receive(reader)
+        if message['type'] != 'start':
+            writer.close()
+            return
+        # Wall clock, so workers on other machines start together too
+        await asyncio.sleep(max(0.0, message['at'] - time.time()))
+        start = time.perf_counter()
+        schedule = arrivals(plan['rate'], plan['warmup'] + plan['duration'],
+                            plan['process'], rng)
+        run = asyncio.ensure_future(loop.run(schedule, plan['warmup'], plan['drain']))
+
+        async def listen():
+            try:
+                while (await receive(reader))['type'] != 'stop':
+                    pass
+            except ConnectionError:
+                pass
+            loop.stop()
+
+        listener = asyncio.ensure_future(listen())
+        taken = {}
+        while not run.done():
+            await asyncio.wait([run], timeout=plan['interval'])
+            if not run.done():
+                await send(writer, {'type': 'report',
+                                    'elapsed': time.perf_counter() - start,
+                                    'results': take(loop, taken).to_dict()})
+        listener.cancel()
+        await send(writer, {'type': 'done', 'elapsed': await run,
+                            'results': take(loop, taken).to_dict()})
+    writer.close()
+
+class Worker:
+    __slots__ = ('name', 'reader', 'writer', 'rate', 'sessions',
+                 'results', 'last_seen', 'elapsed')
+
+    def __init__(self, name: str, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.rate = 0.0
+        self.sessions = 0
+        self.results = Results()
+        self.last_seen = time.perf_counter()
+        # Length of its run once done
+        self.elapsed = None
+
+class Coordinator:
+    """Splits an open-loop run between worker processes.
+
+    Workers connect to the control socket; once `workers` of them have,
+    each gets rate / workers and its part of `sessions`, 0 for none.
+    sessions caps how many games are open at once, not how many are
+    played: finished games make room for new ones. They start at one wall-clock time and run for
+    warmup + duration. Every `interval` each sends what it recorded since
+    its last report; the coordinator merges these into the run's totals
+    and into the live line. A worker is a straggler when it goes silent
+    for `silence` intervals, doesn't finish, sends less than `min_share`
+    of its rate, or its sends leave more than `max_lag` seconds late at
+    p99. Its numbers then understate the load, so the run should not be
+    trusted as a measure of the server.
+    """
+
+    def __init__(self, workers: int, rate: float, duration: float,
+                 sessions: int=0, warmup: float=2.0, url: str=DEFAULT_URL,
+                 players: int=3, process: str='poisson', connections: int=1000,
+                 timeout: float=30, interval: float=1.0, seed: int=None,
+                 silence: float=3, min_share: float=0.9, max_lag: float=0.05):
+        self.expected = workers
+        self.rate = rate
+        self.duration = duration
+        self.sessions = sessions
+        self.warmup = warmup
+        self.url = url
+        self.players = players
+        self.process = process
+        self.connections = connections
+        self.timeout = timeout
+        self.interval = interval
+        self.seed = seed
+        self.silence = silence
+        self.min_share = min_share
+        self.max_lag = max_lag
+        self.drain = 5.0
+        self.workers = []
+        self.joined = None
+        self.results = Results()
+        # Since the last live line
+        self.recent = Results()
+        self.server = None
+
+    async def listen(self, host: str='127.0.0.1', port: int=0):
+        self.joined = asyncio.Event()
+        self.server = await asyncio.start_server(self.accept, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hello = await receive(reader)
+        if len(self.workers) >= self.expected:
+            writer.close()
+            return
+        self.workers.append(Worker(hello['worker'], reader, writer))
+        if len(self.workers) == self.expected:
+            self.joined.set()
+
+    async def collect(self, worker: Worker):
+        while True:
+            try:
+                message = await receive(worker.reader)
+            except ConnectionError:
+                # Lost; stragglers() reports it as unfinished
+                return
+            worker.last_seen = time.perf_counter()
+            results = Results.from_dict(message['results'])
+            worker.results.merge(results)
+            self.results.merge(results)
+            self.recent.merge(results)
+            if message['type'] == 'done':
+                worker.elapsed = message['elapsed']
+                return
+
+    async def run(self, report=None, join_timeout: float=60, lead: float=1.0):
+        await asyncio.wait_for(self.joined.wait(), join_timeout)
+        n = len(self.workers)
+        seed = random.Random(self.seed)
+        for worker, sessions in zip(self.workers, split(self.sessions, n)):
+            worker.rate, worker.sessions = self.rate / n, sessions
+            await send(worker.writer, {
+                'type': 'plan', 'url': self.url, 'rate': worker.rate,
+                'sessions': sessions, 'duration': self.duration,
+                'warmup': self.warmup, 'drain': self.drain,
+                'players': self.players, 'process': self.process,
+                'connections': self.connections, 'timeout': self.timeout,
+                'interval': self.interval, 'seed': seed.getrandbits(64)})
+        for worker in self.workers:
+            message = await asyncio.wait_for(receive(worker.reader), join_timeout)
+            if message['type'] != 'ready':
+                raise ConnectionError(f'{worker.name} sent {message["type"]} instead of ready')
+        at = time.time() + lead
+        for worker in self.workers:
+            await send(worker.writer, {'type': 'start', 'at': at})
+        start = time.perf_counter() + lead
+        for worker in self.workers:
+            worker.last_seen = start
+        collectors = [asyncio.ensure_future(self.collect(w)) for w in self.workers]
+        await asyncio.sleep(lead)
+        deadline = start + self.warmup + self.duration + self.drain + self.silence * self.interval
+        pending = collectors
+        while pending and time.perf_counter() < deadline:
+            done, pending = await asyncio.wait(pending, timeout=self.interval)
+            if report:
+                report(self.live(time.perf_counter() - start))
+        if pending:
+            # Late workers get a stop and one more drain to report back
+            for worker, collector in zip(self.workers, collectors):
+                if not collector.done():
+                    try:
+                        await send(worker.writer, {'type': 'stop'})
+                    except OSError:
+                        # Already gone; stragglers() reports it as unfinished
+                        pass
+            _, pending = await asyncio.wait(pending, timeout=self.drain)
+            for collector in pending:
+                collector.cancel()
+        for worker in self.workers:
+            try:
+                worker.writer.close()
+            except OSError:
+                pass
+        self.server.close()
+        return self.summary()
+
+    def silent(self):
+        now = time.perf_counter()
+        return [w.name for w in self.workers
+                if w.elapsed is None and now - w.last_seen > self.silence * self.interval]
+
+    def live(self, elapsed: float):
+        recent, self.recent = self.recent, Results()
+        overall = recent.latency['all']
+        return {'elapsed': elapsed, 'rate': recent.sent / self.interval,
+                'count': overall.count, 'p50': overall.quantile(50),
+                'p99': overall.quantile(99), 'errors': recent.errors,
+                'timeouts': recent.timeouts, 'silent': self.silent()}
+
+    def stragglers(self):
+        found = []
+        for w in self.workers:
+            if w.elapsed is None:
+                found.append((w.name, 'did not finish'))
+                continue
+            achieved = w.results.sent / w.elapsed if w.elapsed else 0.0
+            lag = w.results.send_lag.quantile(99)
+            if achieved < self.min_share * w.rate:
+                found.append((w.name, f'sent {achieved:.1f}/s of {w.rate:.1f}/s'))
+            elif lag > self.max_lag:
+                found.append((w.name, f'sends {lag * 1e3:.1f} ms late at p99'))
+        return found
+
+    def summary(self):
+        overall = self.results.latency['all'].summarize()
+        return {'workers': [{'name': w.name, 'rate': w.rate, 'sessions': w.sessions,
+                             'sent': w.results.sent, 'elapsed': w.elapsed,
+                             'p99': w.results.latency['all'].quantile(99)}
+                            for w in self.workers],
+                'rate': self.rate,
+                'sent': self.results.sent,
+                'errors': self.results.errors,
+                'timeouts': self.results.timeouts,
+                'overall': overall,
+                'endpoints': {e: h.summarize() for e, h in self.results.latency.items()
+                              if e != 'all'},
+                'send_lag_p99': self.results.send_lag.quantile(99),
+                'stragglers': self.stragglers(),
+                'results': self.results.to_dict()}
+
+def spawn(n: int, host: str, port: int):
+    # Local workers, each its own process and so its own GIL
+    return [subprocess.Popen([sys.executable, '-m', 'harness.distributed', 'worker',
+                              '--connect', f'{host}:{port}'], cwd=ROOT)
+            for _ in range(n)]
+
+def print_live(r: dict):
+    silent = f' silent: {", ".join(r["silent"])}' if r['silent'] else ''
+    print(f'{r["elapsed"]:7.1f}s {r["rate"]:9.1f}/s p50 {r["p50"] * 1e3:8.2f} ms '
+          f'p99 {r["p99"] * 1e3:8.2f} ms errors {r["errors"]} '
+          f'timeouts {r["timeouts"]}{silent}', flush=True)
+
+def print_summary(s: dict):
+    print()
+    for w in s['workers']:
+        elapsed = 'n/a' if w['elapsed'] is None else f'{w["elapsed"]:.1f}s'
+        print(f'{w["name"]:<28} {w["rate"]:9.1f}/s sent {w["sent"]:>8} in {elapsed} '
+              f'p99 {w["p99"] * 1e3:.2f} ms')
+    o = s['overall']
+    print(f'{s["sent"]} sent at {s["rate"]:.1f}/s target, {s["errors"]} errors, '
+          f'{s["timeouts"]} timeouts, send lag p99 {s["send_lag_p99"] * 1e3:.1f} ms')
+    print(f'{"endpoint":<14} {"count":>8} {"p50 ms":>9} {"p99 ms":>9} {"p999 ms":>9}')
+    for endpoint, e in sorted(s['endpoints'].items()) + [('all', o)]:
+        print(f'{endpoint:<14} {e["count"]:>8} {e["p50"] * 1e3:>9.2f} '
+              f'{e["p99"] * 1e3:>9.2f} {e["p999"] * 1e3:>9.2f}')
+    for name, reason in s['stragglers']:
+        print(f'straggler {name}: {reason}')
+
+async def coordinate(args):
+    coordinator = Coordinator(args.workers + args.remote, args.rate, args.duration,
+                              args.sessions, args.warmup, args.url, args.players,
+                              args.process, args.connections, args.timeout,
+                              args.interval, args.seed)
+    host, _, port = args.listen.rpartition(':')
+    port = await coordinator.listen(host, int(port))
+    if args.remote:
+        print(f'waiting for {args.remote} remote workers on {host}:{port}', file=sys.stderr)
+    processes = spawn(args.workers, '127.0.0.1' if host == '0.0.0.0' else host, port)
+    try:
+        summary = await coordinator.run(print_live)
+    finally:
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Spread an open-loop load over worker processes')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='coordinate a run')
+    run.add_argument('--url', default=DEFAULT_URL)
+    run.add_argument('--workers', type=int, default=os.cpu_count(), help='local worker processes')
+    run.add_argument('--remote', type=int, default=0, help='workers to wait for on --listen')
+    run.add_argument('--listen', default='127.0.0.1:0', help='control socket host:port')
+    run.add_argument('--rate', type=float, required=True, help='total actions/s')
+    run.add_argument('--sessions', type=int, default=0, help='cap on games open at once across workers (not a total), 0 for none')
+    run.add_argument('--duration', type=float, default=30)
+    run.add_argument('--warmup', type=float, default=2)
+    run.add_argument('--interval', type=float, default=1, help='seconds between reports')
+    run.add_argument('--process', choices=['poisson', 'uniform'], default='poisson')
+    run.add_argument('--players', type=int, default=3)
+    run.add_argument('--connections', type=int, default=1000, help='per worker')
+    run.add_argument('--timeout', type=float, default=30)
+    run.add_argument('--seed', type=int)
+    run.add_argument('--json', help='also write the summary here')
+    worker = commands.add_parser('worker', help='join a coordinator')
+    worker.add_argument('--connect', required=True, help='coordinator host:port')
+    worker.add_argument('--name')
+    args = parser.parse_args()
+    if args.command == 'worker':
+        host, _, port = args.connect.rpartition(':')
+        asyncio.run(work(host, int(port), args.name))
+    else:
+        summary = asyncio.run(coordinate(args))
+        sys.exit(1 if summary['stragglers'] else 0)
@@ -0,0 +1,245 @@
+import argparse
+import random
+import time
+from types import MappingProxyType
+
+# Same letters, in the same order, as src/alphabet.js
+LETTERS = 'abcdefghjiklmnopqrstuvwxyz'
+
+# One bit per letter, fixed and read-only
+LETTER_BITS = MappingProxyType({c: 1 << i for i, c in enumerate(LETTERS)})
+ALL_LETTERS = (1 << len(LETTERS)) - 1
+
+def word_mask(word: str):
+    # The letters of word as a mask; other characters are left out
+    mask = 0
+    for c in word:
+        mask |= LETTER_BITS.get(c, 0)
+    return mask
+
+def word_extra(word: str):
+    # The characters of word outside LETTERS, such as the 1 of 'word1'
+    return frozenset(c for c in word if c not in LETTER_BITS)
+
+class Alphabet:
+    """Guessed letters as a mask over LETTERS.
+
+    The server also takes keys outside LETTERS (a digit, or any string);
+    those go in this alphabet's own extra dict, in the order guessed, so
+    bit numbers never depend on what other games have seen.
+    """
+
+    __slots__ = ('mask', 'extra')
+
+    def __init__(self, mask: int=0, extra=()):
+        self.mask = mask
+        self.extra = dict.fromkeys(extra)
+
+    def did_set(self, letter: str):
+        b = LETTER_BITS.get(letter)
+        if b is None:
+            return letter in self.extra
+        return bool(self.mask & b)
+
+    def set(self, letter: str):
+        b = LETTER_BITS.get(letter)
+        if b is None:
+            self.extra[letter] = None
+        else:
+            self.mask |= b
+
+    def covers(self, mask: int, extra: frozenset):
+        # Whether every letter of a word with this mask and extra is set
+        return mask & ~self.mask == 0 and all(c in self.extra for c in extra)
+
+    def can_spell(self, word: str):
+        return self.covers(word_mask(word), word_extra(word))
+
+    def guessed(self):
+        return ''.join(c for c in LETTERS if self.mask & LETTER_BITS[c]) + ''.join(self.extra)
+
+    def to_state(self):
+        letters = {c: bool(self.mask & LETTER_BITS[c]) for c in LETTERS}
+        letters.update(dict.fromkeys(self.extra, True))
+        return {'letters': letters}
+
+class Player:
+    __slots__ = ('pid', 'name', 'word', 'mask', 'extra', 'ready', 'alive')
+
+    def __init__(self, pid: str, name: str):
+        self.pid = pid
+        self.name = name
+        self.word = ''
+        self.mask = 0
+        self.extra = frozenset()
+        self.ready = False
+        self.alive = True
+
+    def set_word_and_ready(self, word: str):
+        self.word = word
+        self.mask = word_mask(word)
+        self.extra = word_extra(word)
+        self.ready = True
+
+    def to_state(self):
+        return {'id': self.pid, 'name': self.name, 'word': self.word,
+                'ready': self.ready, 'alive': self.alive}
+
+class Session:
+    """Reference model of Session in src/session.js.
+
+    Methods mirror the JS ones one to one, quirks included, so the model
+    can predict server state. The only randomness is the turn order
+    shuffle on start, which draws from self.random.
+    """
+
+    def __init__(self, sid: str=None, seed: int=None):
+        self.sid = sid
+        self.random = random.Random(seed)
+        self.reset()
+
+    @classmethod
+    def from_state(cls, state: dict, seed: int=None):
+        # Adopt a get-state snapshot, e.g. to take over the server's shuffle
+        session = cls(state['id'], seed)
+        for pid, p in state['players'].items():
+            player = session.players[pid] = Player(pid, p['name'])
+            if p['ready']:
+                player.set_word_and_ready(p['word'])
+            player.alive = p['alive']
+        session.turn_order = list(state['turnOrder'])
+        for c, guessed in state['alphabet']['letters'].items():
+            if guessed:
+                session.alphabet.set(c)
+        session.is_lobby = state['isLobby']
+        return session
+
+    def add_player(self, pid: str, name: str):
+        if pid in self.players:
+            return
+        self.players[pid] = Player(pid, name)
+
+    def _kill_player(self, pid: str):
+        self.players[pid].alive = False
+        if pid in self.turn_order:
+            self.turn_order.remove(pid)
+
+    def remove_player(self, pid: str):
+        if pid not in self.players:
+            return
+        if self.is_lobby or not self.players[pid].ready:
+            del self.players[pid]
+        else:
+            self._kill_player(pid)
+
+    def set_player_word(self, pid: str, word: str):
+        player = self.players.get(pid)
+        if player is None:
+            return
+        player.set_word_and_ready(word)
+        if self.is_lobby:
+            if len(self.players) < 2:
+                return
+            if all(p.ready for p in self.players.values()):
+                self._start()
+        else:
+            self.turn_order.append(pid)
+
+    def _start(self):
+        self.turn_order = list(self.players)
+        self.random.shuffle(self.turn_order)
+        self.is_lobby = False
+
+    def guess_letter(self, letter: str):
+        if self.is_lobby or self.alphabet.did_set(letter) or self.check_game_over():
+            return
+        self.alphabet.set(letter)
+        for pid, player in self.players.items():
+            if player.ready and player.alive and self.alphabet.covers(player.mask, player.extra):
+                self._kill_player(pid)
+        # As in the JS, the guesser is looked up after the kills
+        guesser = self.current_player()
+        if not self.check_game_over() and guesser is not None and guesser.alive:
+            self._progress_turn()
+
+    def current_pid(self):
+        return self.turn_order[0] if self.turn_order else None
+
+    def current_player(self):
+        return self.players.get(self.current_pid())
+
+    def guess_word(self, pid: str, word: str):
+        if self.is_lobby or self.check_game_over():
+            return
+        target = self.players.get(pid)
+        guesser = self.current_player()
+        if target is None or not target.alive or target is guesser:
+            return
+        if word == target.word:
+            if target.ready:
+                self._kill_player(target.pid)
+        elif guesser.ready:
+            self._kill_player(guesser.pid)
+        if not self.check_game_over() and guesser.alive:
+            self._progress_turn()
+
+    def check_game_over(self):
+        current = self.current_pid()
+        for pid, player in self.players.items():
+            if pid != current and player.alive:
+                return False
+        return True
+
+    def skip_turn(self):
+        self._progress_turn()
+
+    def _progress_turn(self):
+        if self.turn_order:
+            self.turn_order.append(self.turn_order.pop(0))
+
+    def reset(self):
+        self.players = {}
+        self.turn_order = []
+        self.alphabet = Alphabet()
+        self.is_lobby = True
+
+    def to_state(self):
+        return {'id': self.sid,
+                'players': {pid: p.to_state() for pid, p in self.players.items()},
+                'turnOrder': list(self.turn_order),
+                'alphabet': self.alphabet.to_state(),
+                'isLobby': self.is_lobby}
+
+def simulate(games: int, players: int=3, seed: int=None):
+    # Play random games on the model alone, returns the number of moves
+    rng = random.Random(seed)
+    words = ['banana', 'apple', 'cashew', 'walnut', 'pecan', 'almond']
+    moves = 0
+    for g in range(games):
+        session = Session(str(g), rng.random())
+        pids = [f'p{i}' for i in range(players)]
+        for pid in pids:
+            session.add_player(pid, pid)
+        for pid in pids:
+            session.set_player_word(pid, rng.choice(words))
+        letters = list(LETTERS)
+        rng.shuffle(letters)
+        while not session.check_game_over():
+            if letters and rng.random() < 0.8:
+                session.guess_letter(letters.pop())
+            else:
+                target = rng.choice(pids)
+                session.guess_word(target, rng.choice(words))
+            moves += 1
+    return moves
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure reference engine throughput')
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    moves = simulate(args.games, args.players, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f'{moves} moves in {elapsed:.2f}s ({moves / elapsed * 60:,.0f} moves/min)')
@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import time
+import socketio
+from harness.client import DEFAULT_URL
+from harness.loadgen import WORDS
+from harness.stats import summarize
+
+class Member:
+    """One simulated player on its own Socket.IO connection.
+
+    Every game-update is queued with its arrival time, so an action can be
+    matched to the update it caused at each room member.
+
+    server.js runs socket.io 2.x, which needs a python-socketio 4.x client.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pid = None
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.updates = asyncio.Queue()
+        self.connected = asyncio.Event()
+        self.sio.on('connect-successful', self.on_connect_successful)
+        self.sio.on('game-update', self.on_game_update)
+
+    async def on_connect_successful(self, pid):
+        self.pid = pid
+        self.connected.set()
+
+    async def on_game_update(self, session):
+        self.updates.put_nowait((time.perf_counter(), session))
+
+    async def connect(self, url: str):
+        await self.sio.connect(url, transports=['websocket'])
+        await self.connected.wait()
+
+    async def next_update(self, timeout: float):
+        return await asyncio.wait_for(self.updates.get(), timeout)
+
+    async def disconnect(self):
+        await self.sio.disconnect()
+
+class Room:
+    """A session played by `size` members, one action at a time."""
+
+    def __init__(self, url: str, size: int, timeout: float=10):
+        self.url = url
+        self.timeout = timeout
+        self.members = [Member(f'name{i}') for i in range(size)]
+        self.session = None
+
+    async def broadcast(self, actor: Member, event: str, *args,
+                        members: list=None):
+        # Emit one action, then wait for its game-update at every member
+        members = members or self.members
+        start = time.perf_counter()
+        await actor.sio.emit(event, args)
+        arrivals = await asyncio.gather(*(m.next_update(self.timeout)
+                                          for m in members))
+        self.session = arrivals[0][1]
+        return [t - start for t, _ in arrivals]
+
+    async def setup(self):
+        await asyncio.gather(*(m.connect(self.url) for m in self.members))
+        host = self.members[0]
+        await self.broadcast(host, 'create-game', host.name, members=[host])
+        pin = self.session['pin']
+        for i, member in enumerate(self.members[1:], 2):
+            await self.broadcast(member, 'join-game', pin, member.name,
+                                 members=self.members[:i])
+        for i, member in enumerate(self.members):
+            await self.broadcast(member, 'start-game', WORDS[i % len(WORDS)])
+
+    def current(self):
+        pid = self.session['turnOrder'][0]
+        return next(m for m in self.members if m.pid == pid)
+
+    async def play(self, actions: int, action: str, latencies: list,
+                   spreads: list):
+        letters = iter('zqxjkvwyfb')
+        for _ in range(actions):
+            if action == 'guess-letter':
+                args = (next(letters, 'z'),)
+            else:
+                args = ()
+            arrivals = await self.broadcast(self.current(), action, *args)
+            latencies.extend(arrivals)
+            spreads.append(max(arrivals))
+
+    async def close(self):
+        await asyncio.gather(*(m.disconnect() for m in self.members),
+                             return_exceptions=True)
+
+async def measure(url: str, size: int, rooms: int, actions: int,
+                  action: str='skip-turn'):
+    """Fan-out latency for `rooms` concurrent rooms of `size` members.
+
+    Returns the distribution of per-member latency (action emit to
+    game-update arrival) and of whole-room latency (emit to last arrival).
+    """
+    latencies, spreads = [], []
+    group = [Room(url, size) for _ in range(rooms)]
+    try:
+        await asyncio.gather(*(room.setup() for room in group))
+        start = time.perf_counter()
+        await asyncio.gather(*(room.play(actions, action, latencies, spreads)
+                               for room in group))
+        elapsed = time.perf_counter() - start
+    finally:
+        await asyncio.gather(*(room.close() for room in group))
+    return {'size': size, 'rooms': rooms, 'elapsed': elapsed,
+            'member': summarize(latencies), 'room': summarize(spreads)}
+
+def print_result(r: dict):
+    m, room = r['member'], r['room']
+    print(f'{r["size"]:>5} {r["rooms"]:>6} {m["count"]:>9} '
+          f'{m["p50"] * 1e3:>8.2f} {m["p99"] * 1e3:>8.2f} {m["p999"] * 1e3:>8.2f} '
+          f'{room["p50"] * 1e3:>9.2f} {room["p99"] * 1e3:>9.2f}')
+
+async def main(args):
+    print(f'{"size":>5} {"rooms":>6} {"updates":>9} {"p50 ms":>8} {"p99 ms":>8} '
+          f'{"p999 ms":>8} {"room p50":>9} {"room p99":>9}')
+    for rooms in args.rooms:
+        for size in args.sizes:
+            print_result(await measure(args.url, size, rooms,
+                                       args.actions, args.action))
+
+if __name__ == '__main__':
+    ints = lambda s: [int(x) for x in s.split(',')]
+    parser = argparse.ArgumentParser(description='Measure game-update fan-out latency over Socket.IO')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--sizes', type=ints, default=[2, 4, 8, 16, 32],
+                        help='comma separated room sizes')
+    parser.add_argument('--rooms', type=ints, default=[1, 10, 100],
+                        help='comma separated numbers of concurrent rooms')
+    parser.add_argument('--actions', type=int, default=50,
+                        help='actions per room')
+    parser.add_argument('--action', default='skip-turn',
+                        choices=['skip-turn', 'guess-letter'])
+    asyncio.run(main(parser.parse_args()))
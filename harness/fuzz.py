@@ -0,0 +1,227 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from harness.client import DEFAULT_URL, HangmenClient
+from harness.engine import LETTERS, Session
+from harness.loadgen import WORDS
+from harness.runner import DEFAULT_TESTS, load_module
+
+# Per-process state set up by init_worker
+tests = None
+tc = None
+
+def init_worker(url: str, path: str=DEFAULT_TESTS):
+    # Drive the server through test.py's own helpers and checks
+    global tests, tc
+    tests = load_module(path)
+    tests.client = HangmenClient(url)
+    tc = unittest.TestCase()
+    tc.maxDiff = None
+
+def random_word(rng: random.Random):
+    if rng.random() < 0.7:
+        return rng.choice(WORDS)
+    return ''.join(rng.choice(LETTERS) for _ in range(rng.randint(1, 6)))
+
+def generate(rng: random.Random, max_steps: int=40):
+    """Random but valid game script.
+
+    Steps are lists so scripts round-trip through JSON. Players are
+    referred to by join order, since pids are only known at run time.
+    """
+    n = rng.randint(2, 6)
+    words = [random_word(rng) for _ in range(n)]
+    script = [['join', f'name{i}'] for i in range(n)]
+    script += [['set-word', i, words[i]] for i in range(n)]
+    for _ in range(rng.randint(1, max_steps)):
+        r = rng.random()
+        if r < 0.5:
+            script.append(['guess-letter', rng.choice(LETTERS)])
+        elif r < 0.75:
+            target = rng.randrange(len(words))
+            word = words[target] if rng.random() < 0.5 else random_word(rng)
+            script.append(['guess-word', target, word])
+        elif r < 0.85:
+            # Hot join, usually followed by a word
+            script.append(['join', f'name{len(words)}'])
+            words.append(random_word(rng))
+            if rng.random() < 0.8:
+                script.append(['set-word', len(words) - 1, words[-1]])
+        elif r < 0.9:
+            player = rng.randrange(len(words))
+            words[player] = random_word(rng)
+            script.append(['set-word', player, words[player]])
+        else:
+            script.append(['exit', rng.randrange(len(words))])
+    return script
+
+def guessed(state: dict):
+    return {c for c, v in state['alphabet']['letters'].items() if v}
+
+def check_invariants(prev: dict, state: dict):
+    players = state['players']
+    turn_order = state['turnOrder']
+    if turn_order and not players.get(turn_order[0], {}).get('alive'):
+        raise AssertionError(f'dead-no-turn: {turn_order[0]} holds the turn but is not alive')
+    for pid in turn_order:
+        if pid not in players or not players[pid]['alive']:
+            raise AssertionError(f'turn-order-alive: {pid} in turnOrder but not alive')
+    if prev is not None:
+        lost = guessed(prev) - guessed(state)
+        if lost:
+            raise AssertionError(f'alphabet-grows: lost letters {sorted(lost)}')
+        revived = [pid for pid, p in players.items() if p['alive']
+                   and pid in prev['players'] and not prev['players'][pid]['alive']]
+        if revived:
+            raise AssertionError(f'dead-stays-dead: {revived} came back to life')
+
+def run_step(sid: str, pids: list, model: Session, step: list):
+    kind = step[0]
+    if kind == 'join':
+        pid = tests.join_session(tc, sid, step[1])
+        pids.append(pid)
+        model.add_player(pid, step[1])
+        return
+    if kind == 'guess-letter':
+        tests.guess_letter(tc, sid, step[1])
+        model.guess_letter(step[1])
+        return
+    # Remaining steps name a player, skip them if it never joined
+    if step[1] >= len(pids):
+        return
+    pid = pids[step[1]]
+    if kind == 'set-word':
+        tests.set_word(tc, sid, pid, step[2])
+        model.set_player_word(pid, step[2])
+    elif kind == 'guess-word':
+        tests.guess_word(tc, sid, pid, step[2])
+        model.guess_word(pid, step[2])
+    elif kind == 'exit':
+        tests.exit_session(tc, sid, pid)
+        model.remove_player(pid)
+    else:
+        raise ValueError(f'unknown step {kind}')
+
+def execute(script: list):
+    """Play script on a fresh session, returns the first failure or None.
+
+    After every step the server state must satisfy the invariants and
+    match the reference model under check_session_state.
+    """
+    sid = tests.new_session(tc)
+    model = Session(sid)
+    pids = []
+    prev = None
+    try:
+        for i, step in enumerate(script):
+            was_lobby = model.is_lobby
+            run_step(sid, pids, model, step)
+            state = tests.get_state(tc, sid)
+            if was_lobby and not model.is_lobby \
+                    and sorted(model.turn_order) == sorted(state['turnOrder']):
+                # The start shuffle is random, follow the server's
+                model.turn_order = list(state['turnOrder'])
+            check_invariants(prev, state)
+            try:
+                tests.check_session_state(tc, state, sid=sid, model=model)
+            except AssertionError as e:
+                raise AssertionError(f'model-mismatch: {e}')
+            prev = state
+    except AssertionError as e:
+        return {'step': i, 'error': str(e)}
+    except Exception as e:
+        return {'step': i, 'error': f'exception: {e!r}'}
+    return None
+
+def kind(failure: dict):
+    return failure['error'].split(':', 1)[0]
+
+def shrink(script: list, failure: dict, max_runs: int=500):
+    """Remove chunks of steps while the same kind of failure reproduces."""
+    target = kind(failure)
+    script = script[:failure['step'] + 1]
+    chunk = max(1, len(script) // 2)
+    runs = 0
+    while runs < max_runs:
+        i, changed = 0, False
+        while i < len(script) and runs < max_runs:
+            candidate = script[:i] + script[i + chunk:]
+            runs += 1
+            result = execute(candidate) if candidate else None
+            if result is not None and kind(result) == target:
+                script, failure, changed = candidate[:result['step'] + 1], result, True
+            else:
+                i += chunk
+        if not changed:
+            if chunk == 1:
+                break
+            chunk //= 2
+    return script, failure
+
+def fuzz_one(seed: int, max_steps: int=40):
+    script = generate(random.Random(seed), max_steps)
+    failure = execute(script)
+    result = {'seed': seed, 'steps': len(script)}
+    if failure is not None:
+        result['script'], result['failure'] = shrink(script, failure)
+    return result
+
+def save_case(directory: str, result: dict):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{kind(result["failure"])}-{result["seed"]}.json')
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=1)
+    return path
+
+def fuzz(seeds: range, url: str=DEFAULT_URL, workers: int=None,
+         max_steps: int=40, out: str='fuzz-failures'):
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    scripts, steps, failures = 0, 0, []
+    with ProcessPoolExecutor(workers, mp_context=context,
+                             initializer=init_worker, initargs=(url,)) as pool:
+        for result in pool.map(fuzz_one, seeds, [max_steps] * len(seeds),
+                               chunksize=16):
+            scripts += 1
+            steps += result['steps']
+            if 'failure' in result:
+                failures.append(save_case(out, result))
+                print(f'seed {result["seed"]}: {result["failure"]["error"]} '
+                      f'({len(result["script"])} steps) -> {failures[-1]}')
+    elapsed = time.perf_counter() - start
+    print(f'{scripts} scripts, {steps} steps in {elapsed:.1f}s '
+          f'({scripts / elapsed:.1f} scripts/s, {steps / elapsed:.1f} steps/s), '
+          f'{len(failures)} failures')
+    return failures
+
+def replay_case(path: str, url: str=DEFAULT_URL):
+    with open(path) as f:
+        case = json.load(f)
+    init_worker(url)
+    failure = execute(case['script'])
+    print(f'{path}: {failure["error"] if failure else "passes"}')
+    return failure
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fuzz the server with random game scripts')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--scripts', type=int, default=1000)
+    parser.add_argument('--max-steps', type=int, default=40)
+    parser.add_argument('-j', '--workers', type=int)
+    parser.add_argument('--out', default='fuzz-failures',
+                        help='directory for shrunk failing cases')
+    parser.add_argument('--replay', nargs='+', metavar='CASE',
+                        help='re-run saved cases instead of fuzzing')
+    args = parser.parse_args()
+    if args.replay:
+        failed = [replay_case(path, args.url) for path in args.replay]
+        raise SystemExit(any(failed))
+    failures = fuzz(range(args.seed, args.seed + args.scripts), args.url,
+                    args.workers, args.max_steps, args.out)
+    raise SystemExit(bool(failures))
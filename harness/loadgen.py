@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import random
+import string
+import time
+from collections import defaultdict
+from harness.aioclient import AsyncHangmenClient
+from harness.bot import Bot, WordIndex, guessed_mask, load_words
+from harness.client import DEFAULT_URL
+from harness.stats import summarize
+
+WORDS = ['banana', 'apple', 'cashew', 'walnut', 'pecan',
+         'almond', 'cherry', 'mango', 'peach', 'grape']
+
+def is_game_over(state: dict):
+    # Mirrors Session.checkGameOver: nobody besides the current player alive
+    current = state['turnOrder'][0] if state['turnOrder'] else None
+    return all(pid == current or not p['alive']
+               for pid, p in state['players'].items())
+
+class LoadGenerator:
+    """Plays whole games concurrently against one server.
+
+    Each game follows the flow encoded in test.py: new-session, join-session
+    per player, set-word per player, then alternating guess-letter and
+    guess-word until the game is over. With a bot, words come from its
+    dictionary and every move is the bot's choice instead.
+    """
+
+    def __init__(self, client: AsyncHangmenClient,
+                 players: int=3, max_turns: int=200,
+                 p_correct: float=0.3, seed: int=None, bot: Bot=None):
+        self.client = client
+        self.bot = bot
+        self.players = players
+        self.max_turns = max_turns
+        self.p_correct = p_correct
+        self.random = random.Random(seed)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.actions = 0
+        self.sessions = 0
+        self.failed = 0
+
+    async def act(self, post_type: str, *args):
+        method = getattr(self.client, post_type.replace('-', '_'))
+        start = time.perf_counter()
+        try:
+            res = await method(*args)
+        except Exception:
+            self.errors[post_type] += 1
+            raise
+        self.latencies[post_type].append(time.perf_counter() - start)
+        self.actions += 1
+        return res
+
+    async def play(self):
+        sid = await self.act('new-session')
+        pids = []
+        for i in range(self.players):
+            pids.append(await self.act('join-session', sid, f'name{i}'))
+        dictionary = self.bot.index.words if self.bot else WORDS
+        words = {pid: self.random.choice(dictionary) for pid in pids}
+        for pid in pids:
+            await self.act('set-word', sid, pid, words[pid])
+
+        for turn in range(self.max_turns):
+            state = await self.act('get-state', sid)
+            if state['isLobby'] or is_game_over(state):
+                break
+            if self.bot:
+                current = state['turnOrder'][0]
+                targets = [pid for pid, p in state['players'].items()
+                           if p['alive'] and pid != current]
+                move = self.bot.choose(guessed_mask(state['alphabet']['letters']),
+                                       words[current], targets)
+                if move is None:
+                    break
+                await self.act(move[0], sid, *move[1:])
+            elif turn % 2 == 0:
+                letters = state['alphabet']['letters']
+                unguessed = [c for c in string.ascii_lowercase if not letters[c]]
+                if not unguessed:
+                    break
+                await self.act('guess-letter', sid, self.random.choice(unguessed))
+            else:
+                current = state['turnOrder'][0]
+                targets = [pid for pid, p in state['players'].items()
+                           if p['alive'] and pid != current]
+                target = self.random.choice(targets)
+                word = (words[target] if self.random.random() < self.p_correct
+                        else self.random.choice(WORDS))
+                await self.act('guess-word', sid, target, word)
+        self.sessions += 1
+
+    async def run(self, sessions: int, concurrency: int):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded():
+            async with semaphore:
+                try:
+                    await self.play()
+                except Exception:
+                    self.failed += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(sessions)))
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed: float):
+        return {'elapsed': elapsed,
+                'sessions': self.sessions,
+                'failed': self.failed,
+                'actions': self.actions,
+                'sessions_per_sec': self.sessions / elapsed,
+                'actions_per_sec': self.actions / elapsed,
+                'errors': dict(self.errors),
+                'endpoints': {k: summarize(v) for k, v in self.latencies.items()}}
+
+def print_report(report: dict):
+    print(f'{report["sessions"]} sessions, {report["actions"]} actions '
+          f'in {report["elapsed"]:.2f}s')
+    print(f'{report["sessions_per_sec"]:.1f} sessions/s, '
+          f'{report["actions_per_sec"]:.1f} actions/s')
+    if report['failed']:
+        print(f'{report["failed"]} sessions failed, errors: {report["errors"]}')
+    print(f'{"endpoint":<14} {"count":>8} {"p50 ms":>9} {"p99 ms":>9} {"p999 ms":>9}')
+    for endpoint, s in sorted(report['endpoints'].items()):
+        print(f'{endpoint:<14} {s["count"]:>8} {s["p50"] * 1e3:>9.2f} '
+              f'{s["p99"] * 1e3:>9.2f} {s["p999"] * 1e3:>9.2f}')
+
+async def main(args):
+    async with AsyncHangmenClient(args.url, pool_size=args.pool_size,
+                                  timeout=args.timeout) as client:
+        bot = Bot(WordIndex(load_words(args.words)), args.seed) if args.words else None
+        generator = LoadGenerator(client, players=args.players, seed=args.seed, bot=bot)
+        report = await generator.run(args.sessions, args.concurrency)
+    print_report(report)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play concurrent games against a server')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--pool-size', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--words', help='word list for bot players, one word per line')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,192 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import defaultdict
+from harness.stats import Histogram
+
+ENDPOINTS = ['new-session', 'join-session', 'get-state', 'set-word',
+             'guess-letter', 'guess-word', 'exit-session', 'reset-session']
+
+class Metrics:
+    """HangmenClient observer keeping per-endpoint latency and size histograms.
+
+    convergence holds how long state waits took to see the expected state
+    and convergence_timeouts how many gave up; the client's own counts
+    are added with add_convergence.
+
+    Results export to JSON (mergeable, the format compare reads) and to a
+    flat CSV summary.
+    """
+
+    def __init__(self):
+        self.latency = defaultdict(Histogram)
+        self.size = defaultdict(Histogram)
+        self.errors = defaultdict(int)
+        self.convergence = Histogram()
+        self.convergence_timeouts = 0
+
+    def __call__(self, post_type, payload, res, start, latency):
+        self.latency[post_type].add(latency)
+        self.size[post_type].add(len(res.content))
+        if res.status_code >= 400:
+            self.errors[post_type] += 1
+
+    def add_convergence(self, times: Histogram, timeouts: int):
+        self.convergence.merge(times)
+        self.convergence_timeouts += timeouts
+
+    def merge(self, other: 'Metrics'):
+        for endpoint, h in other.latency.items():
+            self.latency[endpoint].merge(h)
+        for endpoint, h in other.size.items():
+            self.size[endpoint].merge(h)
+        for endpoint, n in other.errors.items():
+            self.errors[endpoint] += n
+        self.add_convergence(other.convergence, other.convergence_timeouts)
+        return self
+
+    def to_dict(self):
+        return {'endpoints': {e: {'latency': self.latency[e].to_dict(),
+                                  'size': self.size[e].to_dict(),
+                                  'errors': self.errors[e]}
+                              for e in self.latency},
+                'convergence': {'time': self.convergence.to_dict(),
+                                'timeouts': self.convergence_timeouts}}
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        metrics = cls()
+        for endpoint, e in d['endpoints'].items():
+            metrics.latency[endpoint] = Histogram.from_dict(e['latency'])
+            metrics.size[endpoint] = Histogram.from_dict(e['size'])
+            metrics.errors[endpoint] = e['errors']
+        # Files from before convergence was recorded have none
+        if 'convergence' in d:
+            metrics.convergence = Histogram.from_dict(d['convergence']['time'])
+            metrics.convergence_timeouts = d['convergence']['timeouts']
+        return metrics
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def export_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    def export_csv(self, path: str):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['endpoint', 'count', 'errors', 'mean_ms', 'p50_ms',
+                             'p90_ms', 'p99_ms', 'p999_ms', 'max_ms',
+                             'mean_bytes', 'max_bytes'])
+            for endpoint in sorted(self.latency, key=order):
+                s = self.latency[endpoint].summarize()
+                size = self.size[endpoint].summarize()
+                writer.writerow([endpoint, s['count'], self.errors[endpoint]]
+                                + [f'{s[k] * 1e3:.3f}' for k in
+                                   ('mean', 'p50', 'p90', 'p99', 'p999', 'max')]
+                                + [f'{size["mean"]:.1f}', f'{size["max"]:.0f}'])
+            if self.convergence.count or self.convergence_timeouts:
+                # Timed out waits count as errors, there are no sizes
+                s = self.convergence.summarize()
+                writer.writerow(['convergence', s['count'], self.convergence_timeouts]
+                                + [f'{s[k] * 1e3:.3f}' for k in
+                                   ('mean', 'p50', 'p90', 'p99', 'p999', 'max')]
+                                + ['', ''])
+
+    def export(self, path: str):
+        # Write path as JSON and a CSV summary beside it
+        self.export_json(path)
+        self.export_csv(os.path.splitext(path)[0] + '.csv')
+
+def order(endpoint: str):
+    return ENDPOINTS.index(endpoint) if endpoint in ENDPOINTS else len(ENDPOINTS)
+
+def compare(baseline: Metrics, current: Metrics,
+            threshold: float=0.2, min_count: int=20):
+    """p50 and p99 of each endpoint in both runs, flagged as regressed
+    when they grew by more than threshold.
+
+    Endpoints with fewer than min_count samples on either side are too
+    noisy to judge and are skipped. Returns (regressions, skipped), where
+    skipped lists (endpoint, reason).
+    """
+    regressions = []
+    skipped = []
+    for endpoint in sorted(set(baseline.latency) | set(current.latency), key=order):
+        if endpoint not in current.latency:
+            skipped.append((endpoint, 'missing from current run'))
+            continue
+        if endpoint not in baseline.latency:
+            skipped.append((endpoint, 'missing from baseline'))
+            continue
+        base, cur = baseline.latency[endpoint], current.latency[endpoint]
+        if len(base) < min_count or len(cur) < min_count:
+            skipped.append((endpoint, f'{len(base)} and {len(cur)} samples, '
+                                      f'fewer than {min_count}'))
+            continue
+        for q in (50, 99):
+            before, after = base.quantile(q), cur.quantile(q)
+            change = after / before - 1 if before > 0 else 0.0
+            regressions.append({'endpoint': endpoint, 'quantile': f'p{q}',
+                                'baseline': before, 'current': after,
+                                'change': change,
+                                'regressed': change > threshold})
+    return regressions, skipped
+
+def main(argv: list=None):
+    parser = argparse.ArgumentParser(description='Inspect, merge and compare endpoint metrics')
+    commands = parser.add_subparsers(dest='command', required=True)
+    show = commands.add_parser('show', help='print a metrics file')
+    show.add_argument('path')
+    merge = commands.add_parser('merge', help='merge several metrics files')
+    merge.add_argument('paths', nargs='+')
+    merge.add_argument('-o', '--output', required=True)
+    cmp = commands.add_parser('compare', help='fail if current regressed from baseline')
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=0.2,
+                     help='allowed relative growth of p50 and p99')
+    cmp.add_argument('--min-count', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == 'show':
+        metrics = Metrics.load(args.path)
+        for endpoint in sorted(metrics.latency, key=order):
+            s = metrics.latency[endpoint].summarize()
+            print(f'{endpoint:<14} {s["count"]:>8} p50 {s["p50"] * 1e3:8.2f} ms '
+                  f'p99 {s["p99"] * 1e3:8.2f} ms '
+                  f'mean {metrics.size[endpoint].summarize()["mean"]:8.0f} B')
+        if metrics.convergence.count or metrics.convergence_timeouts:
+            s = metrics.convergence.summarize()
+            print(f'{"convergence":<14} {s["count"]:>8} p50 {s["p50"] * 1e3:8.2f} ms '
+                  f'p99 {s["p99"] * 1e3:8.2f} ms '
+                  f'{metrics.convergence_timeouts} timed out')
+        return 0
+    if args.command == 'merge':
+        merged = Metrics()
+        for path in args.paths:
+            merged.merge(Metrics.load(path))
+        merged.export(args.output)
+        return 0
+
+    regressions, skipped = compare(Metrics.load(args.baseline), Metrics.load(args.current),
+                                   args.threshold, args.min_count)
+    for r in regressions:
+        flag = 'REGRESSED' if r['regressed'] else 'ok'
+        print(f'{r["endpoint"]:<14} {r["quantile"]:>4} {r["baseline"] * 1e3:8.2f} ms '
+              f'-> {r["current"] * 1e3:8.2f} ms ({r["change"]:+.1%}) {flag}')
+    for endpoint, reason in skipped:
+        print(f'{endpoint:<14} skipped: {reason}')
+    if not regressions:
+        # A gate that compared nothing must not pass
+        print('no endpoint had enough samples to compare')
+        return 1
+    return int(any(r['regressed'] for r in regressions))
+
+if __name__ == '__main__':
+    sys.exit(main())
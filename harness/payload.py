@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from harness.client import DEFAULT_URL, HangmenClient
+from harness.engine import Session
+from harness.loadgen import WORDS, is_game_over
+
+# Guessing letters by English frequency ends games in a realistic number of turns
+LETTER_ORDER = 'etaoinshrdlucmfwypvbgkjqxz'
+
+def encode(state: dict):
+    # Same bytes as JSON.stringify, which socket.io and express both use
+    return json.dumps(state, separators=(',', ':')).encode()
+
+def game_update(session: Session):
+    """The model's state as src/session.js serializes it in game-update.
+
+    JSON.stringify keeps the JS assignment order, keys sessions and
+    players by pin and includes the log, which the server never appends
+    to; the HTTP API's id naming would get the sizes slightly wrong.
+    """
+    state = session.to_state()
+    return {'pin': state['id'],
+            'players': {pid: {'pin': p['id'], 'name': p['name'], 'word': p['word'],
+                              'ready': p['ready'], 'alive': p['alive']}
+                        for pid, p in state['players'].items()},
+            'turnOrder': state['turnOrder'],
+            'alphabet': state['alphabet'],
+            'isLobby': state['isLobby'],
+            'log': []}
+
+def model_payloads(players: int):
+    session = Session('sid', seed=0)
+    for i in range(players):
+        session.add_player(f'p{i}', f'name{i}')
+    for i in range(players):
+        session.set_player_word(f'p{i}', WORDS[i % len(WORDS)])
+    yield encode(game_update(session))
+    for c in LETTER_ORDER:
+        if session.check_game_over():
+            break
+        session.guess_letter(c)
+        yield encode(game_update(session))
+
+def http_payloads(players: int, url: str=DEFAULT_URL):
+    with HangmenClient(url) as client:
+        sid = client.new_session()
+        pids = [client.join_session(sid, f'name{i}') for i in range(players)]
+        for i, pid in enumerate(pids):
+            client.set_word(sid, pid, WORDS[i % len(WORDS)])
+        for c in LETTER_ORDER:
+            payload = client.post('get-state', {'sid': sid}).content
+            yield payload
+            if is_game_over(json.loads(payload)):
+                break
+            client.guess_letter(sid, c)
+
+def socket_payloads(players: int, url: str=DEFAULT_URL):
+    # Imported here so the other sources work without python-socketio
+    from harness.fanout import Room
+
+    async def play():
+        room = Room(url, players)
+        payloads = []
+        try:
+            await room.setup()
+            payloads.append(encode(room.session))
+            for c in LETTER_ORDER:
+                if is_game_over(room.session):
+                    break
+                await room.broadcast(room.current(), 'guess-letter', c)
+                payloads.append(encode(room.session))
+        finally:
+            await room.close()
+        return payloads
+
+    return asyncio.run(play())
+
+SOURCES = {'model': model_payloads, 'http': http_payloads, 'socket': socket_payloads}
+
+def field_sizes(state: dict):
+    # Bytes per top-level field, with players split further by player field
+    sizes = {}
+    for key, value in state.items():
+        if key == 'players':
+            for player in value.values():
+                for field, v in player.items():
+                    name = f'players.{field}'
+                    sizes[name] = sizes.get(name, 0) + len(encode({field: v})) - 2
+            sizes['players.*'] = len(encode(value)) - sum(
+                len(encode(p)) for p in value.values())
+        else:
+            sizes[key] = len(encode({key: value})) - 2
+    return sizes
+
+def delta(prev: dict, cur: dict):
+    """Minimal update taking prev to cur.
+
+    Newly guessed letters, players whose alive flag flipped, players that
+    joined or left, and the turn order as a rotation of prev with the
+    killed players removed, falling back to the full list.
+    """
+    d = {}
+    letters = [c for c, v in cur['alphabet']['letters'].items()
+               if v and not prev['alphabet']['letters'].get(c)]
+    if letters:
+        d['letters'] = ''.join(letters)
+    killed = [pid for pid, p in cur['players'].items()
+              if pid in prev['players'] and prev['players'][pid]['alive'] != p['alive']]
+    if killed:
+        d['killed'] = killed
+    joined = {pid: p for pid, p in cur['players'].items() if pid not in prev['players']}
+    if joined:
+        d['joined'] = joined
+    left = [pid for pid in prev['players'] if pid not in cur['players']]
+    if left:
+        d['left'] = left
+    if cur['isLobby'] != prev['isLobby']:
+        d['isLobby'] = cur['isLobby']
+    if cur['turnOrder'] != prev['turnOrder']:
+        order = [pid for pid in prev['turnOrder'] if pid in cur['turnOrder']]
+        rotations = [k for k in range(len(order))
+                     if order[k:] + order[:k] == cur['turnOrder']]
+        d['turn'] = rotations[0] if rotations else cur['turnOrder']
+    return d
+
+def profile(payloads: list, players: int):
+    fields = defaultdict(int)
+    full_bytes, delta_bytes, decode_time = 0, 0, 0.0
+    prev = None
+    for payload in payloads:
+        start = time.perf_counter()
+        state = json.loads(payload)
+        decode_time += time.perf_counter() - start
+        full_bytes += len(payload)
+        for field, size in field_sizes(state).items():
+            fields[field] += size
+        delta_bytes += len(payload if prev is None else encode(delta(prev, state)))
+        prev = state
+    n = max(1, len(payloads))
+    return {'players': players,
+            'payloads': len(payloads),
+            'bytes_per_payload': full_bytes / n,
+            'decode_us_per_payload': decode_time / n * 1e6,
+            # Every payload is broadcast to each player in the room
+            'room_bytes_per_turn': full_bytes / n * players,
+            'fields': {k: v / full_bytes for k, v in fields.items()},
+            'delta_bytes_per_payload': delta_bytes / n,
+            'delta_savings': 1 - delta_bytes / full_bytes if full_bytes else 0.0}
+
+def print_profile(p: dict, top: int=6):
+    print(f'{p["players"]:>7} {p["payloads"]:>8} {p["bytes_per_payload"]:>10.0f} '
+          f'{p["decode_us_per_payload"]:>10.1f} {p["room_bytes_per_turn"]:>12.0f} '
+          f'{p["delta_bytes_per_payload"]:>10.0f} {p["delta_savings"]:>8.1%}')
+    biggest = sorted(p['fields'].items(), key=lambda f: -f[1])[:top]
+    print(' ' * 8 + ', '.join(f'{k} {v:.0%}' for k, v in biggest))
+
+if __name__ == '__main__':
+    ints = lambda s: [int(x) for x in s.split(',')]
+    parser = argparse.ArgumentParser(description='Profile full-session payload size and decode cost')
+    parser.add_argument('--players', type=ints, default=[2, 4, 8, 16, 32, 64],
+                        help='comma separated player counts')
+    parser.add_argument('--source', choices=sorted(SOURCES), default='model',
+                        help='model replays the engine as game-update payloads '
+                             'without a server, http polls get-state, '
+                             'socket listens to game-update')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    args = parser.parse_args()
+    print(f'{"players":>7} {"payloads":>8} {"bytes":>10} {"decode us":>10} '
+          f'{"room B/turn":>12} {"delta B":>10} {"savings":>8}')
+    for players in args.players:
+        source = SOURCES[args.source]
+        if args.source == 'model':
+            payloads = list(source(players))
+        else:
+            payloads = list(source(players, args.url))
+        print_profile(profile(payloads, players))
@@ -0,0 +1,136 @@
+import argparse
+import queue
+import string
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from harness.client import DEFAULT_URL, HangmenClient
+from harness.stats import summarize
+
+class SessionPool:
+    """Sessions set up ahead of time and handed out one at a time.
+
+    start() builds `size` sessions on `concurrency` threads, each with one
+    player per name. Active sessions also get a word per player, which
+    starts the game. Every take() queues a replacement, so the pool keeps
+    refilling in the background. With background=False take() leaves the
+    refilling to top_up(), for callers that must know when the pool sends
+    requests (test.py keeps pool traffic out of the per-test server logs).
+    A size of 0 means no pool: take() builds each session when it is
+    asked for. A session is a dict of sid, pids, names,
+    words and the state fetched once setup was done.
+
+    setup_times holds how long each session took to build and wait_times
+    how long take() blocked, so neither ends up in measured time.
+    """
+
+    def __init__(self, client: HangmenClient, size: int=10,
+                 names: list=None, words: list=None,
+                 active: bool=True, concurrency: int=None, background: bool=True):
+        self.client = client
+        self.size = size
+        self.names = names or ['name' + str(i) for i in range(1, 4)]
+        self.words = words or ['banana', 'apple', 'cashew']
+        if active and len(self.words) != len(self.names):
+            raise ValueError('need one word per player')
+        self.active = active
+        self.background = background
+        self.pending = set()
+        self.sessions = queue.Queue()
+        self.executor = ThreadPoolExecutor(concurrency or max(size, 1))
+        self.setup_times = []
+        self.wait_times = []
+
+    def build(self):
+        start = time.perf_counter()
+        try:
+            sid = self.client.new_session()
+            pids = [self.client.join_session(sid, name) for name in self.names]
+            if self.active:
+                for pid, word in zip(pids, self.words):
+                    self.client.set_word(sid, pid, word)
+            session = {'sid': sid, 'pids': pids, 'names': list(self.names),
+                       'words': list(self.words) if self.active else None,
+                       'state': self.client.get_state(sid)}
+        except Exception as e:
+            # Raised again by the take() that gets it
+            session = e
+        self.setup_times.append(time.perf_counter() - start)
+        self.sessions.put(session)
+
+    def refill(self, n: int=1):
+        for _ in range(n):
+            future = self.executor.submit(self.build)
+            self.pending.add(future)
+            future.add_done_callback(self.pending.discard)
+
+    def top_up(self):
+        # Build whatever is missing from a full pool
+        self.refill(self.size - self.sessions.qsize() - len(self.pending))
+
+    def settle(self, timeout: float=None):
+        # Wait until no session is being built
+        wait(list(self.pending), timeout)
+
+    def start(self, wait: bool=True):
+        self.refill(self.size)
+        if wait:
+            while self.sessions.qsize() < self.size:
+                time.sleep(0.001)
+        return self
+
+    def take(self, timeout: float=10):
+        if not self.size:
+            self.build()
+        start = time.perf_counter()
+        session = self.sessions.get(timeout=timeout)
+        self.wait_times.append(time.perf_counter() - start)
+        if self.background:
+            self.refill()
+        if isinstance(session, Exception):
+            raise session
+        return session
+
+    def report(self):
+        return {'built': len(self.setup_times),
+                'setup': summarize(self.setup_times),
+                'setup_total': sum(self.setup_times),
+                'waited': sum(self.wait_times)}
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Time gameplay on pre-built sessions, keeping setup out of the measurement')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--size', type=int, default=20)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--letters', default='etaoinsh',
+                        help='letters guessed in each game')
+    args = parser.parse_args()
+    with HangmenClient(args.url, pool_size=args.size + 1) as client:
+        pool = SessionPool(client, args.size)
+        start = time.perf_counter()
+        with pool:
+            prewarm = time.perf_counter() - start
+            measured = []
+            for _ in range(args.games):
+                session = pool.take()
+                start = time.perf_counter()
+                for c in args.letters:
+                    if c in string.ascii_lowercase:
+                        client.guess_letter(session['sid'], c)
+                measured.append(time.perf_counter() - start)
+    r = pool.report()
+    s = summarize(measured)
+    print(f'pre-warmed {args.size} sessions in {prewarm:.2f}s, built {r["built"]} in total '
+          f'({r["setup_total"]:.2f}s of setup, p50 {r["setup"]["p50"] * 1e3:.1f} ms each)')
+    print(f'waited {r["waited"]:.3f}s for sessions')
+    print(f'measured {args.games} games in {sum(measured):.2f}s, '
+          f'p50 {s["p50"] * 1e3:.2f} ms, p99 {s["p99"] * 1e3:.2f} ms per game')
@@ -0,0 +1,298 @@
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from harness.client import DEFAULT_URL, CONTENT_TYPES, HangmenClient, check_response
+from harness.engine import Alphabet, LETTERS, Player, Session
+
+class Operation:
+    __slots__ = ('id', 'kind', 'args', 'invoke', 'response', 'ok', 'state')
+
+    def __init__(self, id: int, kind: str, args: tuple):
+        self.id = id
+        self.kind = kind
+        self.args = args
+        self.invoke = None
+        self.response = None
+        # False when the outcome is unknown: the action may or may not
+        # have been applied
+        self.ok = False
+        self.state = None
+
+    def __repr__(self):
+        return f'{self.kind}{self.args} [{self.invoke:.6f}, {self.response:.6f}]'
+
+def fingerprint(session: Session):
+    # What get-state shows that the rules constrain
+    return (session.alphabet.mask, tuple(session.turn_order),
+            tuple(pid for pid, p in session.players.items() if p.alive),
+            frozenset(session.alphabet.extra))
+
+def observed(state: dict):
+    alphabet = Alphabet()
+    for c, v in state['alphabet']['letters'].items():
+        if v:
+            alphabet.set(c)
+    return (alphabet.mask, tuple(state['turnOrder']),
+            tuple(pid for pid, p in state['players'].items() if p['alive']),
+            frozenset(alphabet.extra))
+
+def clone(session: Session):
+    copy = Session.__new__(Session)
+    copy.sid, copy.random = session.sid, session.random
+    copy.players = {}
+    for pid, p in session.players.items():
+        player = copy.players[pid] = Player.__new__(Player)
+        player.pid, player.name, player.word = p.pid, p.name, p.word
+        player.mask, player.extra = p.mask, p.extra
+        player.ready, player.alive = p.ready, p.alive
+    copy.turn_order = list(session.turn_order)
+    copy.alphabet = Alphabet(session.alphabet.mask, session.alphabet.extra)
+    copy.is_lobby = session.is_lobby
+    return copy
+
+def apply(session: Session, op: Operation):
+    if op.kind == 'guess-letter':
+        session.guess_letter(*op.args)
+    elif op.kind == 'guess-word':
+        session.guess_word(*op.args)
+
+def invariant_violations(ops: list):
+    """Rule breaks visible from the reads alone, in real-time order."""
+    reads = sorted((op for op in ops if op.kind == 'get-state' and op.ok),
+                   key=lambda op: op.invoke)
+    violations = []
+    for op in reads:
+        state = op.state
+        current = state['turnOrder'][0] if state['turnOrder'] else None
+        if current is not None and not state['players'][current]['alive']:
+            violations.append(f'dead player {current} holds the turn in {op}')
+    for i, a in enumerate(reads):
+        for b in reads[i + 1:]:
+            if b.invoke <= a.response:
+                continue
+            before, after = observed(a.state), observed(b.state)
+            if before[0] & ~after[0] or not before[3] <= after[3]:
+                violations.append(f'alphabet lost letters between {a} and {b}')
+            break
+    return violations
+
+def check(ops: list, initial: Session, max_states: int=10 ** 6):
+    """Search for a sequential order of ops that the rules explain.
+
+    Ops may be ordered any way their intervals allow, and each read must
+    show the model's state at its place. The search is depth first with
+    three prunings: reads that match the current state and actions that
+    can no longer change anything are placed at once without branching,
+    and of several identical actions only the earliest to respond is
+    tried next. (done set, model state) pairs that already failed are
+    remembered. Actions whose outcome is unknown may also be dropped.
+
+    Returns (ok, number of explored states, length of the longest order found).
+    """
+    ops = sorted(ops, key=lambda op: op.invoke)
+    n = len(ops)
+    failed = set()
+    explored = 0
+    best = 0
+
+    def candidates(done: int):
+        horizon = float('inf')
+        found = []
+        # Everything below the lowest unplaced op is placed
+        for i in range((~done & (done + 1)).bit_length() - 1, n):
+            if done >> i & 1:
+                continue
+            op = ops[i]
+            if op.invoke > horizon:
+                break
+            found.append(i)
+            if op.response < horizon:
+                horizon = op.response
+        return found
+
+    # Read results as fingerprints, plus their alive sets
+    seen = {i: observed(op.state) for i, op in enumerate(ops)
+            if op.kind == 'get-state' and op.ok}
+    alive_sets = {i: frozenset(f[2]) for i, f in seen.items()}
+
+    def forced(done: int, session: Session):
+        # Place everything that needs no choice. None when a read that has
+        # to come next can never match: letters are never unguessed and
+        # the dead stay dead.
+        while True:
+            progress = False
+            current = fingerprint(session)
+            over = session.check_game_over()
+            for i in candidates(done):
+                op = ops[i]
+                if i in seen:
+                    if seen[i] != current:
+                        if (seen[i][0] & current[0] != current[0]
+                                or not current[3] <= seen[i][3]
+                                or not alive_sets[i] <= frozenset(current[2])):
+                            return None
+                        continue
+                elif op.kind != 'get-state' and not over and not (
+                        op.kind == 'guess-letter' and session.alphabet.did_set(op.args[0])):
+                    continue
+                done |= 1 << i
+                progress = True
+            if not progress:
+                return done
+
+    # Each frame: (done, session, choices left to try)
+    stack = []
+
+    def push(done: int, session: Session):
+        nonlocal explored, best
+        done = forced(done, session)
+        if done is None:
+            return False
+        best = max(best, bin(done).count('1'))
+        key = (done, fingerprint(session))
+        if key in failed:
+            return False
+        explored += 1
+        # Identical actions have identical effects, so only the one that
+        # must respond first is worth trying
+        first = {}
+        for i in candidates(done):
+            op = ops[i]
+            if op.kind == 'get-state':
+                continue
+            key_op = (op.kind, op.args, op.ok)
+            if key_op not in first or op.response < ops[first[key_op]].response:
+                first[key_op] = i
+        choices = list(first.values())
+        stack.append((done, session, key, choices))
+        return True
+
+    push(0, clone(initial))
+    full = (1 << n) - 1
+    while stack:
+        done, session, key, choices = stack[-1]
+        if done == full:
+            return True, explored, n
+        if explored > max_states:
+            raise RuntimeError(f'gave up after {max_states} states')
+        if not choices:
+            failed.add(key)
+            stack.pop()
+            continue
+        i = choices.pop()
+        op = ops[i]
+        if not op.ok:
+            # Unknown outcome: also try the action never happening
+            push(done | 1 << i, clone(session))
+        after = clone(session)
+        apply(after, op)
+        push(done | 1 << i, after)
+    return False, explored, best
+
+class RaceStress:
+    """Fires bursts of concurrent actions at one session.
+
+    Every round `actors` threads each send one guess-letter or guess-word
+    and `readers` threads send get-state, all released together by a
+    barrier. Invocation and response times of every call are kept for
+    check(). Letters come from a small pool so duplicates race too.
+    """
+
+    def __init__(self, client: HangmenClient, players: int=4, actors: int=16,
+                 readers: int=4, letters: str='aeinorst', seed: int=None):
+        self.client = client
+        self.players = players
+        self.actors = actors
+        self.readers = readers
+        self.letters = letters
+        self.random = random.Random(seed)
+        self.executor = ThreadPoolExecutor(actors + readers)
+
+    def setup(self):
+        sid = self.client.new_session()
+        pids = [self.client.join_session(sid, f'name{i}') for i in range(self.players)]
+        self.words = {}
+        for pid in pids:
+            self.words[pid] = ''.join(self.random.choice(self.letters)
+                                      for _ in range(self.random.randint(3, 6)))
+            self.client.set_word(sid, pid, self.words[pid])
+        return sid, self.client.get_state(sid)
+
+    def call(self, barrier: threading.Barrier, sid: str, op: Operation):
+        barrier.wait()
+        payload = {'sid': sid}
+        if op.kind == 'guess-letter':
+            payload['letter'] = op.args[0]
+        elif op.kind == 'guess-word':
+            payload['pid'], payload['word'] = op.args
+        op.invoke = time.perf_counter()
+        try:
+            res = self.client.post(op.kind, payload)
+            op.response = time.perf_counter()
+            if op.kind == 'get-state':
+                op.state = check_response(res, CONTENT_TYPES['get-state'])
+            op.ok = res.status_code == 200
+        except Exception:
+            # Fails open: the request may have reached the server
+            op.response = float('inf')
+
+    def round(self, sid: str, ops: list):
+        barrier = threading.Barrier(self.actors + self.readers)
+        batch = []
+        for _ in range(self.actors):
+            if self.random.random() < 0.7:
+                op = Operation(len(ops), 'guess-letter', (self.random.choice(self.letters),))
+            else:
+                target = self.random.choice(list(self.words))
+                word = (self.words[target] if self.random.random() < 0.5
+                        else self.random.choice(LETTERS) * 3)
+                op = Operation(len(ops), 'guess-word', (target, word))
+            ops.append(op)
+            batch.append(op)
+        for _ in range(self.readers):
+            op = Operation(len(ops), 'get-state', ())
+            ops.append(op)
+            batch.append(op)
+        for future in [self.executor.submit(self.call, barrier, sid, op) for op in batch]:
+            future.result()
+
+    def run(self, rounds: int):
+        sid, initial = self.setup()
+        ops = []
+        for _ in range(rounds):
+            self.round(sid, ops)
+        return Session.from_state(initial), ops
+
+    def close(self):
+        self.executor.shutdown()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Race concurrent actions on one session and check the history')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--actors', type=int, default=16)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    failures = 0
+    with HangmenClient(args.url, pool_size=args.actors + args.readers) as client:
+        stress = RaceStress(client, args.players, args.actors, args.readers, seed=args.seed)
+        for i in range(args.sessions):
+            initial, ops = stress.run(args.rounds)
+            start = time.perf_counter()
+            violations = invariant_violations(ops)
+            ok, explored, prefix = check(ops, initial)
+            elapsed = time.perf_counter() - start
+            print(f'session {i}: {len(ops)} ops checked in {elapsed:.2f}s '
+                  f'({explored} states) ' + ('linearizable' if ok else
+                  f'NOT linearizable, longest valid prefix {prefix} ops'))
+            for v in violations:
+                print(f'  {v}')
+            failures += not ok or bool(violations)
+        stress.close()
+    sys.exit(failures > 0)
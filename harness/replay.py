@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, defaultdict
+from harness.aioclient import AsyncHangmenClient
+from harness.client import DEFAULT_URL
+from harness.stats import Reservoir
+
+# Endpoints whose text response is a fresh id that later calls refer to
+ID_RESPONSES = {'new-session': 'sid', 'join-session': 'pid'}
+
+class TraceRecorder:
+    """HangmenClient observer that streams every call to a JSONL trace.
+
+    Each line holds the endpoint, payload, time since recording started,
+    status, latency and response size. Ids handed out by new-session and
+    join-session are kept so a replay can map them to live ones.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, 'w')
+        self.start = time.perf_counter()
+
+    def __call__(self, post_type, payload, res, start, latency):
+        record = {'t': start - self.start,
+                  'endpoint': post_type,
+                  'payload': payload,
+                  'status': res.status_code,
+                  'latency': latency,
+                  'bytes': len(res.content)}
+        if post_type in ID_RESPONSES:
+            record['response'] = res.text
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+def read_trace(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class Replayer:
+    """Streams recorded traces back against a live server.
+
+    Lines are dispatched at their recorded offset divided by speed (speed 0
+    sends as fast as possible), with at most `concurrency` calls in flight.
+    Calls on one session run in recorded order. An id handed out by an
+    earlier line resolves to a future that settles once the live server
+    has handed out the real id; an id the trace never handed out (a trace
+    cut off mid-session) is sent as recorded and counted in unknown_ids.
+    A session's ids are forgotten after `idle` seconds of trace time
+    without a call, so memory stays flat however long the trace is.
+    """
+
+    def __init__(self, client: AsyncHangmenClient,
+                 speed: float=1.0, concurrency: int=100, idle: float=600.0):
+        self.client = client
+        self.speed = speed
+        self.idle = idle
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.latencies = defaultdict(Reservoir)
+        self.lag = Reservoir()
+        self.mismatches = 0
+        self.errors = 0
+        self.unknown_ids = 0
+
+    async def call(self, record: dict, refs: dict, handed_out: asyncio.Future=None,
+                   previous: asyncio.Task=None):
+        # Runs on a semaphore slot replay() took for it
+        try:
+            if previous is not None:
+                await previous
+            payload = record['payload']
+            if payload is not None:
+                payload = dict(payload)
+                for key, future in refs.items():
+                    payload[key] = await future
+                    if payload[key] is None:
+                        raise ValueError(f'{key} was never handed out')
+            start = time.perf_counter()
+            status, body = await self.client.post(record['endpoint'], payload)
+            self.latencies[record['endpoint']].add(time.perf_counter() - start)
+            if status != record['status']:
+                self.mismatches += 1
+            if handed_out is not None:
+                handed_out.set_result(body.decode())
+        except Exception:
+            self.errors += 1
+            if handed_out is not None and not handed_out.done():
+                handed_out.set_result(None)
+        finally:
+            self.semaphore.release()
+
+    async def replay(self, records):
+        loop = asyncio.get_running_loop()
+        # Recorded id -> future of the live id
+        ids = {}
+        # Recorded sid -> recorded pids joined to it, and the trace time of
+        # its latest call, oldest first
+        pids = defaultdict(list)
+        active = OrderedDict()
+        # Last call per recorded sid, so each session keeps its order
+        last = {}
+        tasks = set()
+
+        def forget(sid, task):
+            if last.get(sid) is task:
+                del last[sid]
+
+        start = time.perf_counter()
+        for record in records:
+            if self.speed > 0:
+                due = start + record['t'] / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.lag.add(max(0.0, time.perf_counter() - due))
+            # Take the call's slot before its task exists, so reading
+            # further into the trace waits while `concurrency` are in flight.
+            # Calls only wait on earlier ones, which hold slots already.
+            await self.semaphore.acquire()
+            payload = record['payload'] or {}
+            refs = {}
+            for key in ('sid', 'pid'):
+                if key in payload:
+                    if payload[key] in ids:
+                        refs[key] = ids[payload[key]]
+                    else:
+                        self.unknown_ids += 1
+            handed_out = None
+            if record['endpoint'] in ID_RESPONSES:
+                handed_out = ids[record['response']] = loop.create_future()
+            sid = payload.get('sid')
+            if record['endpoint'] == 'new-session':
+                sid = record['response']
+            elif record['endpoint'] == 'join-session' and sid is not None:
+                pids[sid].append(record['response'])
+            if sid is not None:
+                active[sid] = record['t']
+                active.move_to_end(sid)
+            while active:
+                old, t = next(iter(active.items()))
+                if record['t'] - t <= self.idle:
+                    break
+                del active[old]
+                ids.pop(old, None)
+                for pid in pids.pop(old, ()):
+                    ids.pop(pid, None)
+            task = asyncio.create_task(self.call(record, refs, handed_out, last.get(sid)))
+            if sid is not None:
+                last[sid] = task
+                task.add_done_callback(lambda task, sid=sid: forget(sid, task))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    def report(self, elapsed: float):
+        calls = sum(len(v) for v in self.latencies.values())
+        return {'elapsed': elapsed,
+                'calls': calls,
+                'calls_per_sec': calls / elapsed,
+                'status_mismatches': self.mismatches,
+                'errors': self.errors,
+                'unknown_ids': self.unknown_ids,
+                'lag': self.lag.summarize(),
+                'endpoints': {k: v.summarize() for k, v in self.latencies.items()}}
+
+async def main(args):
+    async with AsyncHangmenClient(args.url, pool_size=args.concurrency) as client:
+        replayer = Replayer(client, args.speed, args.concurrency, args.idle)
+        start = time.perf_counter()
+        await asyncio.gather(*(replayer.replay(read_trace(path))
+                               for path in args.traces))
+        report = replayer.report(time.perf_counter() - start)
+    print(f'{report["calls"]} calls in {report["elapsed"]:.2f}s '
+          f'({report["calls_per_sec"]:.1f}/s), {report["errors"]} errors, '
+          f'{report["status_mismatches"]} status mismatches, '
+          f'{report["unknown_ids"]} ids never handed out')
+    if replayer.lag:
+        print(f'schedule lag p50 {report["lag"]["p50"] * 1e3:.2f} ms, '
+              f'p99 {report["lag"]["p99"] * 1e3:.2f} ms')
+    for endpoint, s in sorted(report['endpoints'].items()):
+        print(f'{endpoint:<14} {s["count"]:>8} p50 {s["p50"] * 1e3:8.2f} ms '
+              f'p99 {s["p99"] * 1e3:8.2f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay recorded JSONL traces against a server')
+    parser.add_argument('traces', nargs='+')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='playback speed multiplier, 0 for as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=100,
+                        help='maximum calls in flight across all traces')
+    parser.add_argument('--idle', type=float, default=600,
+                        help='trace seconds after which a quiet session is forgotten')
+    asyncio.run(main(parser.parse_args()))
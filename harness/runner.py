@@ -0,0 +1,231 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from harness import tracing
+from harness.client import DEFAULT_URL
+from harness.metrics import Metrics
+from harness.server import DEFAULT_COMMAND, ROOT
+
+DEFAULT_TESTS = os.path.join(ROOT, 'test.py')
+# Files test.py writes at exit; each worker writes its own
+WORKER_OUTPUTS = ('HANGMEN_METRICS', 'HANGMEN_RECORD', 'HANGMEN_TRACE')
+
+def load_module(path: str):
+    # test.py would clash with the stdlib test package if imported by name
+    spec = importlib.util.spec_from_file_location('hangmen_tests', path)
+    module = importlib.util.module_from_spec(spec)
+    # unittest looks the module up here to run setUpModule/tearDownModule
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def test_ids(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from test_ids(test)
+        else:
+            yield test.id().split('.', 1)[1]
+
+def collect(path: str=DEFAULT_TESTS, patterns: list=None, module=None):
+    module = module or load_module(path)
+    suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+    ids = list(test_ids(suite))
+    if patterns:
+        ids = [i for i in ids if any(p in i for p in patterns)]
+    return ids
+
+def worker_template(path: str):
+    # metrics.json -> metrics.{pid}.json, unless path has {pid} already
+    if '{pid}' in path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}.{{pid}}{ext}'
+
+@contextmanager
+def held_outputs():
+    # Output variables taken out of the environment meanwhile, so loading
+    # test.py here does not register a writer for the shared path
+    outputs = {var: os.environ.pop(var) for var in WORKER_OUTPUTS if os.environ.get(var)}
+    try:
+        yield outputs
+    finally:
+        os.environ.update(outputs)
+
+def merge_outputs(outputs: dict, pids: set):
+    """Combine the files workers wrote into the paths asked for.
+
+    Metrics and Chrome traces merge into one file and the worker files
+    are removed. Recorded JSONL traces stay one per worker, since each has
+    its own clock; replay.py takes several. Paths the caller gave {pid}
+    are left as they are. Returns the files written.
+    """
+    written = []
+    for var, path in outputs.items():
+        template = worker_template(path)
+        parts = [p for p in (template.format(pid=pid) for pid in sorted(pids))
+                 if os.path.exists(p)]
+        if template == path or var == 'HANGMEN_RECORD':
+            written += parts
+        elif var == 'HANGMEN_METRICS' and parts:
+            merged = Metrics()
+            for part in parts:
+                merged.merge(Metrics.load(part))
+                os.remove(part)
+                os.remove(os.path.splitext(part)[0] + '.csv')
+            merged.export(path)
+            written.append(path)
+        elif var == 'HANGMEN_TRACE' and parts:
+            with open(path, 'w') as f:
+                json.dump(tracing.merge(parts), f)
+            for part in parts:
+                os.remove(part)
+            written.append(path)
+    return written
+
+def shard(ids: list, n: int):
+    return [ids[i::n] for i in range(n) if ids[i::n]]
+
+class TimingResult(unittest.TestResult):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.start = time.perf_counter()
+        self.outcome, self.detail = 'pass', None
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.records.append({'test': test.id().split('.', 1)[1],
+                             'outcome': self.outcome,
+                             'duration': time.perf_counter() - self.start,
+                             'detail': self.detail,
+                             'worker': os.getpid()})
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self.outcome, self.detail = 'fail', self.failures[-1][1]
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self.outcome, self.detail = 'error', self.errors[-1][1]
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self.outcome, self.detail = 'skip', reason
+
+def run_shard(path: str, ids: list, url: str=None, server_command: str=None,
+              outputs: dict=None):
+    # With a server command test.py's setUpModule starts this worker's
+    # server, otherwise every worker talks to url
+    for var, output in (outputs or {}).items():
+        os.environ[var] = worker_template(output)
+    if server_command is not None:
+        os.environ.pop('HANGMEN_URL', None)
+        os.environ['HANGMEN_SERVER_CMD'] = server_command
+    else:
+        os.environ['HANGMEN_URL'] = url or DEFAULT_URL
+    try:
+        module = load_module(path)
+        module.client.base_url = os.environ.get('HANGMEN_URL', DEFAULT_URL)
+        suite = unittest.defaultTestLoader.loadTestsFromNames(ids, module)
+        result = TimingResult()
+        suite.run(result)
+        records = result.records
+        # Module fixture failures are reported against the module, not a test
+        for _, detail in result.errors:
+            if not any(r['detail'] == detail for r in records):
+                records.append({'test': 'setUpModule', 'outcome': 'error',
+                                'duration': 0.0, 'detail': detail,
+                                'worker': os.getpid()})
+        startup = module.server.startup_time if module.server else None
+        return {'tests': records, 'startup': startup}
+    except Exception:
+        detail = traceback.format_exc()
+        return {'tests': [{'test': i, 'outcome': 'error', 'duration': 0.0,
+                           'detail': detail, 'worker': os.getpid()} for i in ids],
+                'startup': None}
+
+def run(path: str=DEFAULT_TESTS, patterns: list=None, workers: int=None,
+        url: str=None, server_command: str=None, ids: list=None):
+    """Run the tests in path across a process pool and merge the results.
+
+    Tests are dealt round-robin into one shard per worker. With
+    server_command every worker starts its own server on a free port,
+    otherwise all workers share url. ids, when given, are run instead
+    of collecting.
+    """
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+    with held_outputs() as outputs:
+        shards = shard(collect(path, patterns) if ids is None else ids, workers)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max(1, len(shards)), mp_context=context) as pool:
+            futures = [pool.submit(run_shard, path, ids, url, server_command, outputs)
+                       for ids in shards]
+            shard_results = [f.result() for f in futures]
+    tests = [r for s in shard_results for r in s['tests']]
+    return {'wall': time.perf_counter() - start,
+            'workers': len(shards),
+            'tests': tests,
+            'server_startup': [s['startup'] for s in shard_results
+                               if s['startup'] is not None],
+            'outputs': merge_outputs(outputs, {r['worker'] for r in tests})}
+
+def print_report(report: dict, slowest: int=5):
+    records = report['tests']
+    # Results reused by harness/selection.py did not run this time
+    ran = [r for r in records if not r.get('cached')]
+    serial = sum(r['duration'] for r in ran)
+    for r in records:
+        if r['outcome'] in ('fail', 'error'):
+            print('=' * 70)
+            print(f'{r["outcome"].upper()}: {r["test"]}')
+            print('-' * 70)
+            print(r['detail'])
+    print('Slowest tests:')
+    for r in sorted(records, key=lambda r: -r['duration'])[:slowest]:
+        print(f'  {r["duration"] * 1e3:8.1f} ms  {r["test"]}')
+    counts = {}
+    for r in records:
+        counts[r['outcome']] = counts.get(r['outcome'], 0) + 1
+    if report['server_startup']:
+        startup = report['server_startup']
+        print(f'Server startup {min(startup) * 1e3:.0f}-{max(startup) * 1e3:.0f} ms '
+              f'across {len(startup)} workers')
+    print(f'Ran {len(ran)} tests on {report["workers"]} workers '
+          f'in {report["wall"]:.3f}s ({serial:.3f}s of test time)')
+    if len(ran) < len(records):
+        print(f'Reused {len(records) - len(ran)} cached results')
+    print(', '.join(f'{k}={v}' for k, v in sorted(counts.items())))
+    for output in report.get('outputs', []):
+        print(f'Wrote {output}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run test.py sharded across processes')
+    parser.add_argument('patterns', nargs='*', help='only run tests whose id contains one of these')
+    parser.add_argument('--tests', default=DEFAULT_TESTS)
+    parser.add_argument('-j', '--workers', type=int)
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--spawn-servers', action='store_true',
+                        help='start a server on a free port for every worker')
+    parser.add_argument('--server-cmd', default=DEFAULT_COMMAND)
+    parser.add_argument('--json', help='also write the merged report here')
+    args = parser.parse_args()
+    report = run(args.tests, args.patterns, args.workers, args.url,
+                 args.server_cmd if args.spawn_servers else None)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(any(r['outcome'] in ('fail', 'error') for r in report['tests']))
@@ -0,0 +1,228 @@
+import argparse
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from harness.client import DEFAULT_URL, HangmenClient
+from harness.engine import Session
+from harness.stats import linear_fit, summarize
+
+def make_word(length: int):
+    # Only a and b, so guesses of any other character kill nobody
+    return ('ab' * length)[:length]
+
+def spare_letter(k: int):
+    # The server accepts any character as a letter. These are never in a
+    # word, so each guess scans every player without ending the game.
+    return chr(0x100 + k)
+
+class ScalingBenchmark:
+    """Times every endpoint on sessions of growing size.
+
+    For each player count and word length a lobby is built with every
+    player ready but one holdout. join-session, exit-session and set-word
+    are timed there; the holdout stops set-word from starting the game.
+    An active game of the same size then times get-state, guess-letter
+    with characters no word contains, and wrong guess-word calls. Each
+    wrong guess kills the guesser, so the game is rebuilt when it runs low
+    on players. Sessions are built with concurrent requests and that time
+    is not measured.
+    """
+
+    def __init__(self, client: HangmenClient, reps: int=20, concurrency: int=32):
+        self.client = client
+        self.reps = reps
+        self.executor = ThreadPoolExecutor(concurrency)
+        # (endpoint, players, length) -> latencies
+        self.samples = defaultdict(list)
+        self.setup_time = 0.0
+        self.spare = 0
+
+    def timed(self, key: tuple, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        self.samples[key].append(time.perf_counter() - start)
+        return result
+
+    def lobby(self, players: int, length: int):
+        start = time.perf_counter()
+        sid = self.client.new_session()
+        pids = list(self.executor.map(lambda i: self.client.join_session(sid, f'name{i}'),
+                                      range(players)))
+        holdout = self.client.join_session(sid, 'holdout')
+        word = make_word(length)
+        list(self.executor.map(lambda pid: self.client.set_word(sid, pid, word), pids))
+        self.setup_time += time.perf_counter() - start
+        return sid, pids, holdout
+
+    def active(self, players: int, length: int):
+        sid, pids, holdout = self.lobby(players, length)
+        start = time.perf_counter()
+        self.client.set_word(sid, holdout, make_word(length))
+        model = Session.from_state(self.client.get_state(sid))
+        self.setup_time += time.perf_counter() - start
+        return sid, model
+
+    def measure(self, players: int, length: int):
+        word = make_word(length)
+        sid, pids, holdout = self.lobby(players, length)
+        for _ in range(self.reps):
+            pid = self.timed(('join-session', players, length),
+                             self.client.join_session, sid, 'extra')
+            self.timed(('exit-session', players, length), self.client.exit_session, sid, pid)
+            self.timed(('set-word', players, length), self.client.set_word, sid, pids[0], word)
+
+        sid, model = self.active(players, length)
+        for _ in range(self.reps):
+            self.timed(('get-state', players, length), self.client.get_state, sid)
+        for _ in range(self.reps):
+            letter = spare_letter(self.spare)
+            self.spare += 1
+            self.timed(('guess-letter', players, length), self.client.guess_letter, sid, letter)
+            model.guess_letter(letter)
+        for _ in range(self.reps):
+            if len(model.turn_order) < 3:
+                sid, model = self.active(players, length)
+            guesser = model.current_pid()
+            target = next(pid for pid in model.turn_order if pid != guesser)
+            self.timed(('guess-word', players, length), self.client.guess_word, sid, target, 'x')
+            model.guess_word(target, 'x')
+
+    def run(self, players: list, lengths: list, progress=None):
+        for n in players:
+            for length in lengths:
+                self.measure(n, length)
+                if progress:
+                    progress(n, length)
+        return self.samples
+
+    def close(self):
+        self.executor.shutdown()
+
+def medians(samples: dict):
+    return {key: summarize(values)['p50'] for key, values in samples.items()}
+
+def exponent(xs: list, ys: list):
+    # Slope of log y over log x; None with fewer than two usable points
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    return linear_fit([p[0] for p in points], [p[1] for p in points])[0]
+
+def power_fit(xs: list, ys: list, max_k: float=3.0, step: float=0.01):
+    """Fit y = c + a * x**k with c, a >= 0 and k up to max_k.
+
+    Returns (k, c, a, weighted squared error).
+
+    Each k on a grid gets a least-squares c and a, weighted by 1/y**2 so
+    every point counts by its relative error.
+    """
+    best, best_fit = None, (None, None, None, None)
+    for i in range(int(max_k / step) + 1):
+        k = i * step
+        X = [x ** k for x in xs]
+        w = [1 / y ** 2 for y in ys]
+        sw = sum(w)
+        sx = sum(wi * xi for wi, xi in zip(w, X))
+        sy = sum(wi * yi for wi, yi in zip(w, ys))
+        sxx = sum(wi * xi * xi for wi, xi in zip(w, X))
+        sxy = sum(wi * xi * yi for wi, xi, yi in zip(w, X, ys))
+        det = sw * sxx - sx * sx
+        if det <= 1e-12 * sw * sxx:
+            # x**k is constant (k = 0): only c to fit
+            a, c = 0.0, sy / sw
+        else:
+            a = (sw * sxy - sx * sy) / det
+            c = (sy - a * sx) / sw
+        if a < 0 or c < 0:
+            continue
+        error = sum(wi * (yi - c - a * xi) ** 2 for wi, xi, yi in zip(w, X, ys))
+        if best is None or error < best:
+            best, best_fit = error, (k, c, a, error)
+    return best_fit
+
+def fit(samples: dict, threshold: float=1.2, min_growth: float=0.25):
+    """Empirical complexity exponent of every endpoint against player count
+    (per word length) and against word length (at the most players).
+
+    Each configuration is represented by its fastest sample, the usual
+    estimate of the cost without interference. Latency is a fixed cost per
+    request plus the part that grows, so the exponent comes from power_fit
+    rather than the log-log slope, which the fixed cost flattens; the
+    slope is kept as raw_exponent. A series is taken as constant, exponent
+    0, when the fitted growing part adds less than min_growth over the
+    range or fits less than twice as well as a constant. Likewise an
+    exponent above threshold is flagged as super-linear only when it fits
+    at least twice as well as the best fit capped at threshold.
+    """
+    best = {key: min(values) for key, values in samples.items()}
+    endpoints = sorted({k[0] for k in best})
+    players = sorted({k[1] for k in best})
+    lengths = sorted({k[2] for k in best})
+    fits = []
+    for endpoint in endpoints:
+        series = [('players', length, [(n, best.get((endpoint, n, length))) for n in players])
+                  for length in lengths]
+        series.append(('length', players[-1],
+                       [(length, best.get((endpoint, players[-1], length))) for length in lengths]))
+        for axis, fixed, points in series:
+            points = [(x, y) for x, y in points if y]
+            if len(points) < 4:
+                continue
+            xs, ys = [x for x, _ in points], [y for _, y in points]
+            k, c, a, error = power_fit(xs, ys)
+            flat = power_fit(xs, ys, max_k=0)[3]
+            if k is not None and (a * (xs[-1] ** k - xs[0] ** k) < min_growth * (c + a * xs[0] ** k)
+                                  or error > flat / 2):
+                k = 0.0
+            super_linear = False
+            if k is not None and k > threshold:
+                capped = power_fit(xs, ys, max_k=threshold)[3]
+                super_linear = capped is None or error < capped / 2
+            fits.append({'endpoint': endpoint, 'axis': axis, 'fixed': fixed,
+                         'points': points, 'exponent': k,
+                         'raw_exponent': exponent(xs, ys),
+                         'super_linear': super_linear})
+    return fits
+
+def print_report(samples: dict, fits: list, setup_time: float):
+    p50 = medians(samples)
+    print(f'{"endpoint":<14} {"players":>8} {"length":>6} {"p50 ms":>9}')
+    for (endpoint, n, length), v in sorted(p50.items()):
+        print(f'{endpoint:<14} {n:>8} {length:>6} {v * 1e3:>9.3f}')
+    print(f'(session setup took {setup_time:.1f}s, not included)')
+    print()
+    for f in fits:
+        against = (f'vs players, {f["fixed"]}-letter words' if f['axis'] == 'players'
+                   else f'vs word length, {f["fixed"]} players')
+        k = 'n/a' if f['exponent'] is None else f'{f["exponent"]:.2f}'
+        raw = 'n/a' if f['raw_exponent'] is None else f'{f["raw_exponent"]:.2f}'
+        flag = '  SUPER-LINEAR' if f['super_linear'] else ''
+        print(f'{f["endpoint"]:<14} {against:<34} exponent {k:>5} (raw {raw}){flag}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit how endpoint latency grows with players and word length')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--players', default='2,10,100,1000,10000')
+    parser.add_argument('--lengths', default='1,4,16,64')
+    parser.add_argument('--reps', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='exponent above which an action counts as super-linear')
+    parser.add_argument('--json', help='also write samples and fits here')
+    args = parser.parse_args()
+    players = [int(n) for n in args.players.split(',')]
+    lengths = [int(n) for n in args.lengths.split(',')]
+    with HangmenClient(args.url, pool_size=args.concurrency, timeout=60) as client:
+        bench = ScalingBenchmark(client, args.reps, args.concurrency)
+        samples = bench.run(players, lengths, progress=lambda n, length: print(
+            f'measured {n} players, {length}-letter words', file=sys.stderr))
+        bench.close()
+    fits = fit(samples, args.threshold)
+    print_report(samples, fits, bench.setup_time)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'samples': [[*k, v] for k, v in samples.items()], 'fits': fits}, f)
+    sys.exit(any(f['super_linear'] for f in fits))
@@ -0,0 +1,168 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import types
+from harness.client import DEFAULT_URL
+from harness.runner import DEFAULT_TESTS, collect, held_outputs, load_module, print_report, run
+from harness.server import DEFAULT_COMMAND, ROOT
+
+# Every request goes through these, whatever the test
+SHARED_FILES = ('server.js', 'package.json', 'package-lock.json')
+DEFAULT_CACHE = os.path.join(ROOT, '.hangmen-cache.json')
+# Outcomes worth keeping; failures and errors always run again
+REUSABLE = ('pass', 'skip')
+
+def digest(path: str):
+    # Content hash of a file under ROOT, None when it is missing
+    try:
+        with open(os.path.join(ROOT, path), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def python_files(module: types.ModuleType):
+    """Source files under ROOT that module reaches through its imports,
+    followed through the modules its globals come from."""
+    found = set()
+    stack = [module]
+    while stack:
+        m = stack.pop()
+        path = getattr(m, '__file__', None)
+        if not path or not path.startswith(ROOT + os.sep):
+            continue
+        path = os.path.relpath(path, ROOT)
+        if path in found:
+            continue
+        found.add(path)
+        for value in vars(m).values():
+            if not isinstance(value, types.ModuleType):
+                value = sys.modules.get(getattr(value, '__module__', None) or '')
+            if value is not None:
+                stack.append(value)
+    return found
+
+def dependencies(module: types.ModuleType, ids: list):
+    """Files each test depends on: the shared server files, the
+    server_modules its class declares (all of src when it declares
+    none) and the Python code the test module runs.
+
+    Imports are not followed: server.js and session-manager.js reach
+    all of src, so following them would tie every test to every file.
+    The declared list is the whole set."""
+    python = python_files(module)
+    all_src = sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, 'src', '*.js')))
+    deps = {}
+    for test_id in ids:
+        cls = getattr(module, test_id.split('.')[0])
+        server = getattr(cls, 'server_modules', None) or all_src
+        deps[test_id] = sorted(set(SHARED_FILES) | set(server) | python)
+    return deps
+
+def fingerprint(files: list, digests: dict):
+    h = hashlib.sha1()
+    for path in files:
+        h.update(f'{path}\0{digests[path]}\0'.encode())
+    # 64 bits is plenty to tell versions of a few files apart
+    return h.hexdigest()[:16]
+
+class ResultCache:
+    """Last result of every test with the fingerprint it ran against.
+
+    On disk it is one JSON object mapping test id to
+    [fingerprint, outcome, duration].
+    """
+
+    def __init__(self, path: str=DEFAULT_CACHE):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def lookup(self, test_id: str, fp: str):
+        # The cached (outcome, duration) if it still holds for fp
+        entry = self.entries.get(test_id)
+        if entry is None or entry[0] != fp or entry[1] not in REUSABLE:
+            return None
+        return entry[1], entry[2]
+
+    def store(self, test_id: str, fp: str, outcome: str, duration: float):
+        self.entries[test_id] = [fp, outcome, round(duration, 4)]
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp, self.path)
+
+def select(ids: list, fingerprints: dict, cache: ResultCache, force: bool=False):
+    # Split ids into tests to run and cached records to reuse
+    to_run, reused = [], []
+    for test_id in ids:
+        hit = None if force else cache.lookup(test_id, fingerprints[test_id])
+        if hit is None:
+            to_run.append(test_id)
+        else:
+            reused.append({'test': test_id, 'outcome': hit[0], 'duration': hit[1],
+                           'detail': None, 'worker': None, 'cached': True})
+    return to_run, reused
+
+def run_incremental(path: str=DEFAULT_TESTS, patterns: list=None, workers: int=None,
+                    url: str=None, server_command: str=None,
+                    cache_path: str=DEFAULT_CACHE, force: bool=False):
+    """Run only the tests whose dependencies changed since they last passed.
+
+    Each test's fingerprint covers the contents of every file from
+    dependencies(). Tests whose fingerprint matches a cached pass or skip
+    report that result again; the rest run through runner.run and their
+    results replace the cache entries. force runs everything.
+    """
+    start = time.perf_counter()
+    with held_outputs():
+        module = load_module(path)
+        ids = collect(path, patterns, module)
+    deps = dependencies(module, ids)
+    digests = {p: digest(p) for p in set().union(*deps.values())}
+    fingerprints = {i: fingerprint(deps[i], digests) for i in ids}
+    cache = ResultCache(cache_path)
+    to_run, reused = select(ids, fingerprints, cache, force)
+    if to_run:
+        report = run(path, workers=workers, url=url,
+                     server_command=server_command, ids=to_run)
+    else:
+        report = {'workers': 0, 'tests': [], 'server_startup': []}
+    for r in report['tests']:
+        if r['test'] in fingerprints:
+            cache.store(r['test'], fingerprints[r['test']], r['outcome'], r['duration'])
+    cache.save()
+    report['tests'] += reused
+    report['cached'] = len(reused)
+    report['wall'] = time.perf_counter() - start
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the tests affected by changes since the last run')
+    parser.add_argument('patterns', nargs='*', help='only consider tests whose id contains one of these')
+    parser.add_argument('--tests', default=DEFAULT_TESTS)
+    parser.add_argument('-j', '--workers', type=int)
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--spawn-servers', action='store_true',
+                        help='start a server on a free port for every worker')
+    parser.add_argument('--server-cmd', default=DEFAULT_COMMAND)
+    parser.add_argument('--cache', default=DEFAULT_CACHE)
+    parser.add_argument('--force', action='store_true', help='run every test and refresh the cache')
+    parser.add_argument('--json', help='also write the merged report here')
+    args = parser.parse_args()
+    report = run_incremental(args.tests, args.patterns, args.workers, args.url,
+                             args.server_cmd if args.spawn_servers else None,
+                             args.cache, args.force)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(any(r['outcome'] in ('fail', 'error') for r in report['tests']))
@@ -0,0 +1,114 @@
+import http.client
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_COMMAND = os.environ.get('HANGMEN_SERVER_CMD', 'node server.js')
+
+def free_port():
+    # Let the OS pick an unused port, then release it for the server
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class ServerProcess:
+    """A server started on its own port, reachable at self.url.
+
+    The port is passed through the PORT environment variable, which
+    server.js reads in place of its default of 3000. The last max_lines
+    lines the server printed are kept in self.lines; mark() and
+    output_since() slice out what it logged during one test, counting
+    lines from the start so marks stay valid as old lines fall off.
+    startup_time is how long it took from spawning the process to the
+    first answered request.
+    """
+
+    def __init__(self, command: str=None,
+                 port: int=None, cwd: str=ROOT, max_lines: int=10000):
+        self.command = command or os.environ.get('HANGMEN_SERVER_CMD', DEFAULT_COMMAND)
+        self.port = port or free_port()
+        self.cwd = cwd
+        self.proc = None
+        self.lines = deque(maxlen=max_lines)
+        # Lines read so far, including those no longer kept
+        self.received = 0
+        self.lock = threading.Lock()
+        self.startup_time = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self, timeout: float=10):
+        env = dict(os.environ, PORT=str(self.port))
+        start = time.perf_counter()
+        self.proc = subprocess.Popen(shlex.split(self.command), cwd=self.cwd,
+                                     env=env, stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, text=True)
+        threading.Thread(target=self.read_output, daemon=True).start()
+        self.wait_ready(timeout)
+        self.startup_time = time.perf_counter() - start
+        return self
+
+    def read_output(self):
+        for line in self.proc.stdout:
+            with self.lock:
+                self.lines.append(line)
+                self.received += 1
+
+    def probe(self):
+        # Ready once the server answers HTTP at all, whatever the status
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=1)
+        try:
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return True
+        except OSError:
+            return False
+        finally:
+            conn.close()
+
+    def wait_ready(self, timeout: float):
+        deadline = time.perf_counter() + timeout
+        delay = 0.001
+        while not self.probe():
+            if self.proc.poll() is not None:
+                raise RuntimeError(f'server exited with {self.proc.returncode}:\n'
+                                   + ''.join(self.lines))
+            if time.perf_counter() >= deadline:
+                self.stop()
+                raise TimeoutError(f'server not ready on {self.port} after {timeout}s')
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    def mark(self):
+        return self.received
+
+    def output_since(self, mark: int):
+        with self.lock:
+            lines = list(self.lines)
+            start = len(lines) - (self.received - mark)
+        if start >= 0:
+            return ''.join(lines[start:])
+        return f'[{-start} lines dropped]\n' + ''.join(lines)
+
+    def stop(self):
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,245 @@
+import sys
+import weakref
+from harness.engine import LETTER_BITS, LETTERS, Session
+from harness.payload import delta
+
+# Players are immutable, so equal ones are shared between snapshots. The
+# table only holds players some snapshot still uses.
+_players = weakref.WeakValueDictionary()
+
+def alphabet_mask(guessed):
+    # Guessed letters (a string, or any iterable of keys) as a 26-bit mask,
+    # plus the sorted keys that are not single letters
+    mask = 0
+    for c in guessed:
+        if c in LETTER_BITS:
+            mask |= LETTER_BITS[c]
+    extra = tuple(sorted(set(sys.intern(c) for c in guessed if c not in LETTER_BITS)))
+    return mask, extra
+
+def letters_mask(letters: dict):
+    return alphabet_mask([c for c, v in letters.items() if v])
+
+class PlayerSnapshot:
+    __slots__ = ('pid', 'name', 'word', 'ready', 'alive', '__weakref__')
+
+    def __new__(cls, pid: str, name: str, word: str, ready: bool, alive: bool):
+        key = (pid, name, word, ready, alive)
+        player = _players.get(key)
+        if player is None:
+            player = _players[key] = super().__new__(cls)
+            player.pid = sys.intern(pid)
+            player.name = sys.intern(name)
+            player.word = sys.intern(word)
+            player.ready = ready
+            player.alive = alive
+        return player
+
+    @classmethod
+    def from_state(cls, state: dict):
+        return cls(state['id'], state['name'], state['word'],
+                   state['ready'], state['alive'])
+
+    def to_state(self):
+        return {'id': self.pid, 'name': self.name, 'word': self.word,
+                'ready': self.ready, 'alive': self.alive}
+
+    def __repr__(self):
+        return f'PlayerSnapshot({self.pid!r}, {self.name!r}, {self.word!r}, {self.ready}, {self.alive})'
+
+class SessionSnapshot:
+    """Immutable, compact copy of a get-state result.
+
+    players keeps the server's order, and turn holds indices into it
+    rather than pids. The alphabet is one 26-bit mask in LETTERS order;
+    any other guessed key (the server takes any string) goes in the
+    sorted tuple extra.
+    Equal players are shared, so a long history mostly stores tuples of
+    pointers.
+    """
+
+    __slots__ = ('sid', 'players', 'turn', 'alphabet', 'extra', 'is_lobby', '_hash')
+
+    def __init__(self, sid: str, players: tuple, turn: tuple,
+                 alphabet: int, extra: tuple=(), is_lobby: bool=True):
+        self.sid = sys.intern(sid) if sid is not None else None
+        self.players = tuple(players)
+        self.turn = tuple(turn)
+        self.alphabet = alphabet
+        self.extra = tuple(sys.intern(c) for c in extra)
+        self.is_lobby = is_lobby
+        self._hash = None
+
+    @classmethod
+    def from_state(cls, state: dict):
+        players = tuple(PlayerSnapshot.from_state(p) for p in state['players'].values())
+        index = {p.pid: i for i, p in enumerate(players)}
+        alphabet, extra = letters_mask(state['alphabet']['letters'])
+        return cls(state['id'], players, (index[pid] for pid in state['turnOrder']),
+                   alphabet, extra, state['isLobby'])
+
+    @classmethod
+    def from_session(cls, session: Session):
+        return cls.from_state(session.to_state())
+
+    @property
+    def pids(self):
+        return [p.pid for p in self.players]
+
+    @property
+    def turn_order(self):
+        return [self.players[i].pid for i in self.turn]
+
+    def player(self, pid: str):
+        for p in self.players:
+            if p.pid == pid:
+                return p
+        return None
+
+    def guessed(self):
+        return ''.join(c for c in LETTERS if self.alphabet & LETTER_BITS[c]) + ''.join(self.extra)
+
+    def to_state(self):
+        letters = {c: bool(self.alphabet & LETTER_BITS[c]) for c in LETTERS}
+        letters.update((c, True) for c in self.extra)
+        return {'id': self.sid,
+                'players': {p.pid: p.to_state() for p in self.players},
+                'turnOrder': self.turn_order,
+                'alphabet': {'letters': letters},
+                'isLobby': self.is_lobby}
+
+    def key(self):
+        return (self.alphabet, self.is_lobby, self.turn, self.players, self.extra, self.sid)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, SessionSnapshot):
+            return NotImplemented
+        # Cheapest fields first; players are shared, so their tuples
+        # compare by identity
+        return (self.alphabet == other.alphabet and self.is_lobby == other.is_lobby
+                and self.turn == other.turn and self.players == other.players
+                and self.extra == other.extra and self.sid == other.sid)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.key())
+        return self._hash
+
+    def diff(self, prev: 'SessionSnapshot'):
+        """What changed since prev, in the shape of payload.delta."""
+        return delta(prev.to_state(), self.to_state())
+
+    def __repr__(self):
+        return (f'SessionSnapshot({self.sid!r}, players={len(self.players)}, '
+                f'turn={self.turn_order}, guessed={self.guessed()!r}, lobby={self.is_lobby})')
+
+def write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+def read_varint(data: bytes, pos: int):
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+class SnapshotWriter:
+    """Packs snapshots into a dense binary stream.
+
+    Strings are written once and referenced by number afterwards, so a
+    history of one session costs a few bytes per state: the alphabet, a
+    flag byte per player and one varint per turn slot. Record layout:
+    sid, lobby flag, alphabet (4 bytes), extra keys, then per player pid,
+    name, word and a ready/alive byte, then the turn indices. Counts and
+    string references are varints; a new string is reference 0 followed
+    by its length and UTF-8 bytes.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.out = bytearray()
+
+    def string(self, s: str):
+        ref = self.strings.get(s)
+        if ref is not None:
+            write_varint(self.out, ref)
+            return
+        self.strings[s] = len(self.strings) + 1
+        data = s.encode()
+        write_varint(self.out, 0)
+        write_varint(self.out, len(data))
+        self.out += data
+
+    def write(self, snapshot: SessionSnapshot):
+        self.string(snapshot.sid or '')
+        self.out.append(snapshot.is_lobby)
+        self.out += snapshot.alphabet.to_bytes(4, 'little')
+        write_varint(self.out, len(snapshot.extra))
+        for c in snapshot.extra:
+            self.string(c)
+        write_varint(self.out, len(snapshot.players))
+        for p in snapshot.players:
+            self.string(p.pid)
+            self.string(p.name)
+            self.string(p.word)
+            self.out.append(p.ready | p.alive << 1)
+        write_varint(self.out, len(snapshot.turn))
+        for i in snapshot.turn:
+            write_varint(self.out, i)
+        return self
+
+    def getvalue(self):
+        return bytes(self.out)
+
+def read_snapshots(data: bytes):
+    strings = []
+    pos = 0
+
+    def string():
+        nonlocal pos
+        ref, pos = read_varint(data, pos)
+        if ref:
+            return strings[ref - 1]
+        length, pos = read_varint(data, pos)
+        s = data[pos:pos + length].decode()
+        pos += length
+        strings.append(s)
+        return s
+
+    while pos < len(data):
+        sid = string() or None
+        is_lobby = bool(data[pos])
+        alphabet = int.from_bytes(data[pos + 1:pos + 5], 'little')
+        pos += 5
+        n, pos = read_varint(data, pos)
+        extra = [string() for _ in range(n)]
+        n, pos = read_varint(data, pos)
+        players = []
+        for _ in range(n):
+            pid, name, word = string(), string(), string()
+            flags = data[pos]
+            pos += 1
+            players.append(PlayerSnapshot(pid, name, word, bool(flags & 1), bool(flags & 2)))
+        n, pos = read_varint(data, pos)
+        turn = []
+        for _ in range(n):
+            i, pos = read_varint(data, pos)
+            turn.append(i)
+        yield SessionSnapshot(sid, players, turn, alphabet, extra, is_lobby)
+
+def dumps(snapshots: list):
+    writer = SnapshotWriter()
+    for snapshot in snapshots:
+        writer.write(snapshot)
+    return writer.getvalue()
+
+def loads(data: bytes):
+    return list(read_snapshots(data))
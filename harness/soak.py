@@ -0,0 +1,180 @@
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from harness.client import DEFAULT_URL, HangmenClient
+from harness.server import DEFAULT_COMMAND, ServerProcess
+from harness.stats import linear_fit
+
+# SessionManager runs cleanSessions every 10 minutes
+CLEANUP_INTERVAL = 600
+
+def rss(pid: int):
+    # Resident set size in bytes
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def open_sockets(pid: int):
+    count = 0
+    for fd in os.listdir(f'/proc/{pid}/fd'):
+        try:
+            if os.readlink(f'/proc/{pid}/fd/{fd}').startswith('socket:'):
+                count += 1
+        except OSError:
+            pass
+    return count
+
+class Sampler(threading.Thread):
+    """Samples a process's RSS and open sockets every `interval` seconds."""
+
+    def __init__(self, pid: int, interval: float=5.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.created = 0
+        self.began = time.perf_counter()
+        self.stopped = threading.Event()
+
+    def sample(self):
+        self.samples.append({'t': time.perf_counter() - self.began,
+                             'rss': rss(self.pid),
+                             'sockets': open_sockets(self.pid),
+                             'sessions': self.created})
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.sample()
+            except OSError:
+                # Server is gone
+                return
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def churn(client: HangmenClient, sampler: Sampler, duration: float,
+          rate: float, players: int=2, leave: bool=True):
+    """Create and abandon `rate` sessions per second for `duration` seconds.
+
+    Every session gets `players` joins. With leave the players exit
+    again, which empties the session as a finished game would. Without it
+    the session is simply dropped with its players still in it.
+    """
+    start = time.perf_counter()
+    errors = 0
+    while time.perf_counter() - start < duration:
+        due = start + sampler.created / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            sid = client.new_session()
+            pids = [client.join_session(sid, f'name{i}') for i in range(players)]
+            if leave:
+                for pid in pids:
+                    client.exit_session(sid, pid)
+        except Exception:
+            errors += 1
+        sampler.created += 1
+    return errors
+
+def analyse(samples: list, cycle: float=CLEANUP_INTERVAL,
+            tolerance: float=1.0, limit: float=None):
+    """Growth slope over the whole run and its last half, plus peaks per
+    cleanup cycle. Memory counts as plateaued when the last half grows by
+    less than `tolerance` MB/hour. With `limit` (MB) the current slope is
+    extrapolated to when the server would reach it.
+    """
+    ts = [s['t'] / 3600 for s in samples]
+    mb = [s['rss'] / 2 ** 20 for s in samples]
+    half = len(samples) // 2
+    slope, _ = linear_fit(ts, mb)
+    tail_slope, _ = linear_fit(ts[half:], mb[half:])
+    socket_slope, _ = linear_fit(ts, [s['sockets'] for s in samples])
+    peaks = {}
+    for s in samples:
+        i = int(s['t'] // cycle)
+        peaks[i] = max(peaks.get(i, 0), s['rss'] / 2 ** 20)
+    report = {'samples': len(samples),
+              'duration_h': ts[-1] if ts else 0.0,
+              'sessions': samples[-1]['sessions'] if samples else 0,
+              'rss_start_mb': mb[0] if mb else 0.0,
+              'rss_end_mb': mb[-1] if mb else 0.0,
+              'slope_mb_per_h': slope,
+              'tail_slope_mb_per_h': tail_slope,
+              'socket_slope_per_h': socket_slope,
+              'cycle_peaks_mb': [peaks[i] for i in sorted(peaks)],
+              'plateaued': tail_slope < tolerance}
+    if limit is not None and tail_slope > 0 and mb:
+        report['hours_to_limit'] = (limit - mb[-1]) / tail_slope
+    return report
+
+def print_report(r: dict):
+    print(f'{r["sessions"]} sessions over {r["duration_h"] * 60:.1f} min, '
+          f'{r["samples"]} samples')
+    print(f'RSS {r["rss_start_mb"]:.1f} MB -> {r["rss_end_mb"]:.1f} MB, '
+          f'slope {r["slope_mb_per_h"]:.2f} MB/h, '
+          f'last half {r["tail_slope_mb_per_h"]:.2f} MB/h')
+    print(f'open sockets slope {r["socket_slope_per_h"]:.2f}/h')
+    print('peak RSS per cleanup cycle: '
+          + ', '.join(f'{p:.1f}' for p in r['cycle_peaks_mb']) + ' MB')
+    print('memory plateaued' if r['plateaued'] else 'memory still growing')
+    if 'hours_to_limit' in r:
+        print(f'limit reached in about {r["hours_to_limit"]:.1f} h')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Churn sessions and watch server memory')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--pid', type=int, help='server process to sample')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start the server on a free port instead')
+    parser.add_argument('--server-cmd', default=DEFAULT_COMMAND)
+    parser.add_argument('--duration', type=float, default=3600, help='seconds')
+    parser.add_argument('--rate', type=float, default=10, help='sessions per second')
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--no-leave', action='store_true',
+                        help='abandon sessions with their players still joined')
+    parser.add_argument('--interval', type=float, default=5, help='seconds between samples')
+    parser.add_argument('--cycle', type=float, default=CLEANUP_INTERVAL,
+                        help='server cleanup interval in seconds')
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help='MB/hour of growth still counted as a plateau')
+    parser.add_argument('--limit', type=float, help='memory limit in MB')
+    parser.add_argument('--csv', help='write raw samples here')
+    args = parser.parse_args()
+    if not args.spawn and args.pid is None:
+        parser.error('need --pid or --spawn')
+
+    server = ServerProcess(args.server_cmd).start() if args.spawn else None
+    try:
+        url = server.url if server else args.url
+        sampler = Sampler(server.proc.pid if server else args.pid, args.interval)
+        sampler.start()
+        with HangmenClient(url) as client:
+            errors = churn(client, sampler, args.duration, args.rate,
+                           args.players, not args.no_leave)
+        sampler.stop()
+        try:
+            sampler.sample()
+        except OSError:
+            # Server is gone; report what was sampled before
+            print('server exited before the last sample', file=sys.stderr)
+    finally:
+        if server is not None:
+            server.stop()
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, ['t', 'rss', 'sockets', 'sessions'])
+            writer.writeheader()
+            writer.writerows(sampler.samples)
+    if errors:
+        print(f'{errors} sessions failed')
+    print_report(analyse(sampler.samples, args.cycle, args.tolerance, args.limit))
@@ -0,0 +1,142 @@
+import math
+import random
+
+def percentile(values: list, q: float):
+    # Nearest-rank percentile of an already sorted list
+    if not values:
+        return float('nan')
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+def summarize(values: list):
+    values = sorted(values)
+    return {'count': len(values),
+            'p50': percentile(values, 50),
+            'p99': percentile(values, 99),
+            'p999': percentile(values, 99.9),
+            'max': values[-1] if values else float('nan')}
+
+def linear_fit(xs: list, ys: list):
+    # Least-squares line through the points, returns (slope, intercept)
+    n = len(xs)
+    if n < 2:
+        return float('nan'), float('nan')
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    if sxx == 0:
+        return float('nan'), my
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx
+    return slope, my - slope * mx
+
+class Reservoir:
+    """Fixed-size uniform sample of a stream, for percentiles in flat memory."""
+
+    def __init__(self, size: int=100000, seed: int=None):
+        self.size = size
+        self.count = 0
+        self.values = []
+        self.random = random.Random(seed)
+
+    def add(self, value: float):
+        self.count += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            i = self.random.randrange(self.count)
+            if i < self.size:
+                self.values[i] = value
+
+    def __len__(self):
+        return self.count
+
+    def summarize(self):
+        summary = summarize(self.values)
+        summary['count'] = self.count
+        return summary
+
+class Histogram:
+    """Log-bucketed histogram with bounded relative error.
+
+    A value v > 0 lands in bucket ceil(log(v) / log(growth)), so every
+    bucket spans a fixed ratio and quantiles are accurate to about
+    (growth - 1) / 2. Histograms with the same growth merge losslessly by
+    adding counts, which is what lets per-worker or per-run results combine.
+    """
+
+    def __init__(self, growth: float=1.02):
+        self.growth = growth
+        self.log_growth = math.log(growth)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int=1):
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zeros += count
+            return
+        i = math.ceil(math.log(value) / self.log_growth)
+        self.buckets[i] = self.buckets.get(i, 0) + count
+
+    def merge(self, other: 'Histogram'):
+        if other.growth != self.growth:
+            raise ValueError('cannot merge histograms with different growth')
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def __len__(self):
+        return self.count
+
+    def quantile(self, q: float):
+        if self.count == 0:
+            return float('nan')
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = self.zeros
+        if seen >= rank:
+            return 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen >= rank:
+                # Geometric middle of the bucket, clamped to what was seen
+                value = self.growth ** (i - 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summarize(self):
+        return {'count': self.count,
+                'mean': self.total / self.count if self.count else float('nan'),
+                'p50': self.quantile(50),
+                'p90': self.quantile(90),
+                'p99': self.quantile(99),
+                'p999': self.quantile(99.9),
+                'max': self.max if self.count else float('nan')}
+
+    def to_dict(self):
+        return {'growth': self.growth, 'count': self.count, 'total': self.total,
+                'min': self.min if self.count else None,
+                'max': self.max if self.count else None,
+                'zeros': self.zeros,
+                'buckets': {str(i): c for i, c in sorted(self.buckets.items())}}
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        h = cls(d['growth'])
+        h.buckets = {int(i): c for i, c in d['buckets'].items()}
+        h.zeros = d['zeros']
+        h.count = d['count']
+        h.total = d['total']
+        if h.count:
+            h.min, h.max = d['min'], d['max']
+        return h
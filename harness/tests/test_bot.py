@@ -0,0 +1,36 @@
+import importlib.util
+import random
+import unittest
+from harness.engine import LETTERS, word_mask
+
+@unittest.skipUnless(importlib.util.find_spec('numpy'), 'WordIndex needs numpy')
+class WordIndexTest(unittest.TestCase):
+    WORDS = ['banana', 'apple', 'cashew', 'walnut', 'pecan', 'almond',
+             'cherry', 'mango', 'peach', 'grape', 'nab', 'a', 'Word1']
+
+    @classmethod
+    def setUpClass(cls):
+        from harness.bot import WordIndex
+        cls.index = WordIndex(cls.WORDS)
+
+    def test_scores_match_brute_force(self):
+        words = [w for w in self.WORDS if w.isalpha() and w.islower()]
+        rng = random.Random(0)
+        for _ in range(200):
+            guessed = word_mask(''.join(rng.sample(LETTERS, rng.randrange(27))))
+            alive = [w for w in words if word_mask(w) & ~guessed]
+            kills = tuple((c, sum(word_mask(w) & ~guessed == 1 << c for w in alive))
+                          for c in range(len(LETTERS)) if not guessed >> c & 1)
+            self.assertEqual(self.index.scores(guessed), (len(alive), kills))
+            sample = self.index.sample(guessed, rng)
+            self.assertEqual(sample is None, not alive)
+            if alive:
+                self.assertIn(sample, alive)
+
+    def test_empty_word_list(self):
+        from harness.bot import WordIndex
+        with self.assertRaises(ValueError):
+            WordIndex(['Word1', ''])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from harness.engine import Alphabet, LETTER_BITS, Session
+
+def game(*words: str, seed: int=0):
+    # Started session with players p0, p1, ... holding words, in turn order
+    session = Session('s', seed=seed)
+    for i, _ in enumerate(words):
+        session.add_player(f'p{i}', f'name{i}')
+    for i, word in enumerate(words):
+        session.set_player_word(f'p{i}', word)
+    session.turn_order = [f'p{i}' for i in range(len(words))]
+    return session
+
+class AlphabetTest(unittest.TestCase):
+
+    def test_letters_and_extras(self):
+        alphabet = Alphabet()
+        for c in 'ba1':
+            alphabet.set(c)
+        self.assertTrue(alphabet.did_set('a'))
+        self.assertTrue(alphabet.did_set('1'))
+        self.assertFalse(alphabet.did_set('2'))
+        self.assertEqual(alphabet.guessed(), 'ab1')
+        self.assertTrue(alphabet.can_spell('ab1'))
+        self.assertFalse(alphabet.can_spell('ab12'))
+        state = alphabet.to_state()['letters']
+        self.assertEqual(len(state), 27)
+        self.assertTrue(state['1'])
+
+    def test_extras_stay_per_alphabet(self):
+        first, second = Alphabet(), Alphabet()
+        first.set('1')
+        second.set('2')
+        self.assertEqual(first.mask, 0)
+        self.assertFalse(second.did_set('1'))
+        self.assertEqual(len(LETTER_BITS), 26)
+
+class SessionTest(unittest.TestCase):
+
+    def test_lobby_until_all_ready(self):
+        session = Session('s')
+        session.add_player('p0', 'ann')
+        session.set_player_word('p0', 'apple')
+        self.assertTrue(session.is_lobby)
+        session.add_player('p1', 'bob')
+        session.guess_letter('a')
+        self.assertEqual(session.alphabet.guessed(), '')
+        session.set_player_word('p1', 'pecan')
+        self.assertFalse(session.is_lobby)
+        self.assertCountEqual(session.turn_order, ['p0', 'p1'])
+
+    def test_guess_passes_the_turn(self):
+        session = game('apple', 'pecan', 'mango')
+        session.guess_letter('z')
+        self.assertEqual(session.turn_order, ['p1', 'p2', 'p0'])
+        # Guessed twice: ignored, the turn stays
+        session.guess_letter('z')
+        self.assertEqual(session.turn_order, ['p1', 'p2', 'p0'])
+
+    def test_reveal_kills(self):
+        session = game('ab', 'abc', 'xyz')
+        session.guess_letter('a')
+        self.assertTrue(session.players['p0'].alive)
+        session.guess_letter('b')
+        # p1 guessed the last letter of p0's word
+        self.assertFalse(session.players['p0'].alive)
+        self.assertTrue(session.players['p1'].alive)
+        self.assertNotIn('p0', session.turn_order)
+
+    def test_non_letter_words_need_their_characters(self):
+        session = game('ab1', 'xyz', 'pqr')
+        session.guess_letter('a')
+        session.guess_letter('b')
+        self.assertTrue(session.players['p0'].alive)
+        session.guess_letter('1')
+        self.assertFalse(session.players['p0'].alive)
+        self.assertTrue(session.alphabet.to_state()['letters']['1'])
+        # Another game never learned about '1'
+        other = game('ab', 'cd')
+        self.assertFalse(other.alphabet.did_set('1'))
+        self.assertEqual(len(other.alphabet.to_state()['letters']), 26)
+
+    def test_wrong_word_kills_guesser(self):
+        session = game('apple', 'pecan', 'mango')
+        session.guess_word('p1', 'apple')
+        self.assertFalse(session.players['p0'].alive)
+        self.assertEqual(session.turn_order, ['p1', 'p2'])
+        session.guess_word('p2', 'mango')
+        self.assertFalse(session.players['p2'].alive)
+
+    def test_game_over(self):
+        session = game('ab', 'cd')
+        self.assertFalse(session.check_game_over())
+        session.guess_word('p1', 'cd')
+        self.assertTrue(session.check_game_over())
+        # Nothing happens once the game is over
+        session.guess_letter('e')
+        self.assertEqual(session.alphabet.guessed(), '')
+        self.assertEqual(session.current_pid(), 'p0')
+
+    def test_from_state_round_trip(self):
+        session = game('ab1', 'cd')
+        session.guess_letter('1')
+        copy = Session.from_state(session.to_state())
+        self.assertEqual(copy.to_state(), session.to_state())
+        self.assertEqual(copy.players['p0'].extra, frozenset('1'))
+
+if __name__ == '__main__':
+    unittest.main()
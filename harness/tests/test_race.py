@@ -0,0 +1,85 @@
+import copy
+import random
+import unittest
+from harness.engine import Session
+from harness.race import Operation, apply, check, clone, invariant_violations
+
+def started(seed: int=0):
+    session = Session('s', seed=seed)
+    for i, word in enumerate(['tea', 'sat', 'nine', 'rose']):
+        session.add_player(f'p{i}', f'name{i}')
+    for i, word in enumerate(['tea', 'sat', 'nine', 'rose']):
+        session.set_player_word(f'p{i}', word)
+    return session
+
+def history(initial: Session, steps: int=30, seed: int=1):
+    """Actions applied one after another to a model, each overlapping the
+    next in time, with a read between every two that shows the model
+    state at that point."""
+    rng = random.Random(seed)
+    model = clone(initial)
+    ops = []
+    for k in range(steps):
+        if rng.random() < 0.8:
+            op = Operation(len(ops), 'guess-letter', (rng.choice('aeinorst'),))
+        else:
+            op = Operation(len(ops), 'guess-word', (rng.choice(list(model.players)),
+                                                    rng.choice(['tea', 'sat', 'xyz'])))
+        op.invoke, op.response, op.ok = k, k + 1.5, True
+        apply(model, op)
+        ops.append(op)
+        read = Operation(len(ops), 'get-state', ())
+        read.invoke, read.response, read.ok = k + 1.2, k + 1.3, True
+        read.state = model.to_state()
+        ops.append(read)
+    return ops
+
+class RaceCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.initial = started()
+        self.ops = history(self.initial)
+        # Shuffled so check() has to sort by time itself
+        random.Random(2).shuffle(self.ops)
+
+    def reads(self):
+        return sorted((op for op in self.ops if op.kind == 'get-state'),
+                      key=lambda op: op.invoke)
+
+    def test_linearizable_history(self):
+        ok, explored, longest = check(self.ops, self.initial)
+        self.assertTrue(ok)
+        self.assertEqual(longest, len(self.ops))
+        self.assertEqual(invariant_violations(self.ops), [])
+
+    def test_unknown_outcomes_may_be_dropped(self):
+        # A failed call that never took effect: the reads don't show it
+        lost = Operation(len(self.ops), 'guess-letter', ('z',))
+        lost.invoke, lost.response = 0.1, float('inf')
+        ok, _, _ = check(self.ops + [lost], self.initial)
+        self.assertTrue(ok)
+
+    def test_tampered_turn_order_is_rejected(self):
+        # Reversing three or more is no rotation any guess could cause
+        read = self.reads()[0]
+        read.state = copy.deepcopy(read.state)
+        read.state['turnOrder'].reverse()
+        self.assertGreater(len(read.state['turnOrder']), 2)
+        ok, _, longest = check(self.ops, self.initial)
+        self.assertFalse(ok)
+        self.assertLess(longest, len(self.ops))
+
+    def test_unguessed_letter_is_rejected(self):
+        # A later read forgets a letter an earlier one showed
+        reads = self.reads()
+        last = reads[-1]
+        guessed = [c for c, v in last.state['alphabet']['letters'].items() if v]
+        self.assertTrue(guessed)
+        last.state = copy.deepcopy(last.state)
+        last.state['alphabet']['letters'][guessed[0]] = False
+        ok, _, _ = check(self.ops, self.initial)
+        self.assertFalse(ok)
+        self.assertTrue(any('lost letters' in v for v in invariant_violations(self.ops)))
+
+if __name__ == '__main__':
+    unittest.main()
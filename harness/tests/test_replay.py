@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+from harness.replay import Replayer
+
+class FakeClient:
+    """Answers every post after a short wait, counting tasks alive meanwhile."""
+
+    def __init__(self):
+        self.ids = 0
+        self.most_tasks = 0
+
+    async def post(self, post_type: str, json: dict=None):
+        self.most_tasks = max(self.most_tasks, len(asyncio.all_tasks()))
+        await asyncio.sleep(0.0005)
+        if post_type in ('new-session', 'join-session'):
+            self.ids += 1
+            return 200, f'live{self.ids}'.encode()
+        return 200, b''
+
+def trace(games: int, actions: int=20):
+    # Games one after another, each a session, two joins and some reads
+    t = 0.0
+    for g in range(games):
+        sid = f's{g}'
+        yield {'t': t, 'endpoint': 'new-session', 'payload': None,
+               'status': 200, 'response': sid}
+        for p in range(2):
+            yield {'t': t, 'endpoint': 'join-session',
+                   'payload': {'sid': sid, 'name': f'name{p}'},
+                   'status': 200, 'response': f'{sid}p{p}'}
+        for _ in range(actions):
+            yield {'t': t, 'endpoint': 'get-state', 'payload': {'sid': sid},
+                   'status': 200}
+        t += 0.01
+
+class ReplayerTest(unittest.TestCase):
+
+    def replay(self, records, concurrency: int):
+        async def run():
+            client = FakeClient()
+            replayer = Replayer(client, speed=0, concurrency=concurrency)
+            await replayer.replay(records)
+            return client, replayer
+        return asyncio.run(run())
+
+    def test_speed_zero_keeps_tasks_within_concurrency(self):
+        # 2,300 lines; without backpressure they all become tasks at once
+        client, replayer = self.replay(trace(100), concurrency=16)
+        self.assertEqual(replayer.report(1.0)['calls'], 2300)
+        self.assertEqual(replayer.errors, 0)
+        self.assertEqual(replayer.unknown_ids, 0)
+        # The calls in flight plus the task running replay()
+        self.assertLessEqual(client.most_tasks, 16 + 1)
+
+    def test_ids_resolve_to_live_ones(self):
+        seen = []
+
+        class Recording(FakeClient):
+            async def post(self, post_type, json=None):
+                seen.append(json)
+                return await super().post(post_type, json)
+
+        async def run():
+            replayer = Replayer(Recording(), speed=0, concurrency=4)
+            await replayer.replay(trace(3, actions=1))
+            return replayer
+
+        replayer = asyncio.run(run())
+        self.assertEqual(replayer.errors, 0)
+        sids = {json['sid'] for json in seen if json}
+        self.assertTrue(sids)
+        self.assertTrue(all(sid.startswith('live') for sid in sids))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from harness.runner import DEFAULT_TESTS, collect, held_outputs, load_module
+from harness.selection import ResultCache, dependencies, digest, fingerprint, select
+
+class SelectionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with held_outputs():
+            cls.module = load_module(DEFAULT_TESTS)
+            cls.ids = collect(DEFAULT_TESTS, None, cls.module)
+        cls.deps = dependencies(cls.module, cls.ids)
+        cls.digests = {p: digest(p) for p in set().union(*cls.deps.values())}
+
+    def selected_after_change(self, path: str):
+        # Classes that rerun when path changes after every test passed
+        fingerprints = {i: fingerprint(self.deps[i], self.digests) for i in self.ids}
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(os.path.join(tmp, 'cache.json'))
+            for i in self.ids:
+                cache.store(i, fingerprints[i], 'pass', 0.0)
+            changed = dict(self.digests, **{path: 'changed'})
+            fingerprints = {i: fingerprint(self.deps[i], changed) for i in self.ids}
+            to_run, reused = select(self.ids, fingerprints, cache)
+        self.assertEqual(len(to_run) + len(reused), len(self.ids))
+        return {i.split('.')[0] for i in to_run}
+
+    def declaring(self, path: str):
+        return {i.split('.')[0] for i in self.ids
+                if path in getattr(self.module, i.split('.')[0]).server_modules}
+
+    def test_src_change_selects_declaring_classes(self):
+        for path in ('src/alphabet.js', 'src/pin.js', 'src/player.js'):
+            with self.subTest(path=path):
+                selected = self.selected_after_change(path)
+                self.assertEqual(selected, self.declaring(path))
+                self.assertLess(len(selected), len({i.split('.')[0] for i in self.ids}))
+
+    def test_shared_change_selects_everything(self):
+        self.assertEqual(self.selected_after_change('server.js'),
+                         {i.split('.')[0] for i in self.ids})
+
+if __name__ == '__main__':
+    unittest.main()
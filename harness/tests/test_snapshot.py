@@ -0,0 +1,39 @@
+import unittest
+from harness.engine import Session, word_mask
+from harness.snapshot import SessionSnapshot, alphabet_mask, dumps, loads
+
+def game(word: str='word1'):
+    session = Session('s', seed=0)
+    session.add_player('p0', 'ann')
+    session.add_player('p1', 'bob')
+    session.set_player_word('p0', word)
+    session.set_player_word('p1', 'apple')
+    return session
+
+class SnapshotTest(unittest.TestCase):
+
+    def test_non_letter_keys_go_to_extra(self):
+        # A digit seen in an earlier word must not get a letter bit
+        word_mask('word1')
+        mask, extra = alphabet_mask('a1')
+        self.assertEqual(mask, 1)
+        self.assertEqual(extra, ('1',))
+
+    def test_round_trip_with_non_letter_key(self):
+        session = game()
+        states = [session.to_state()]
+        for c in ('1', 'a'):
+            session.guess_letter(c)
+            states.append(session.to_state())
+        # The server takes any key, not only single characters
+        states.append(session.to_state())
+        states[-1]['alphabet']['letters']['ab'] = True
+        snapshots = [SessionSnapshot.from_state(s) for s in states]
+        loaded = loads(dumps(snapshots))
+        self.assertEqual(loaded, snapshots)
+        for state, snapshot in zip(states, loaded):
+            self.assertEqual(snapshot.to_state(), state)
+        self.assertEqual(loaded[-1].guessed(), 'a1ab')
+
+if __name__ == '__main__':
+    unittest.main()
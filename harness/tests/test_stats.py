@@ -0,0 +1,53 @@
+import random
+import unittest
+from harness.stats import Histogram, percentile
+
+class HistogramTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.values = [rng.lognormvariate(-6, 1) for _ in range(20000)] + [0.0] * 50
+
+    def filled(self, values):
+        h = Histogram()
+        for v in values:
+            h.add(v)
+        return h
+
+    def test_quantiles_within_bucket_error(self):
+        h = self.filled(self.values)
+        ordered = sorted(self.values)
+        for q in (1, 50, 90, 99, 99.9):
+            exact = percentile(ordered, q)
+            self.assertAlmostEqual(h.quantile(q) / exact, 1, delta=0.02, msg=f'p{q}')
+        self.assertEqual(h.quantile(0.1), 0.0)
+        self.assertAlmostEqual(h.quantile(100) / max(self.values), 1, delta=0.01)
+        self.assertEqual(len(h), len(self.values))
+
+    def test_merge_is_lossless(self):
+        whole = self.filled(self.values)
+        parts = [self.filled(self.values[i::3]) for i in range(3)]
+        merged = Histogram()
+        for part in parts:
+            merged.merge(part)
+        a, b = merged.to_dict(), whole.to_dict()
+        # Only the float total depends on the order values were added in
+        self.assertAlmostEqual(a.pop('total'), b.pop('total'))
+        self.assertEqual(a, b)
+        for q in (50, 99, 99.9):
+            self.assertEqual(merged.quantile(q), whole.quantile(q))
+
+    def test_round_trip(self):
+        h = self.filled(self.values)
+        copy = Histogram.from_dict(h.to_dict())
+        self.assertEqual(copy.summarize(), h.summarize())
+        empty = Histogram.from_dict(Histogram().to_dict())
+        self.assertEqual(empty.count, 0)
+        self.assertNotEqual(empty.quantile(50), empty.quantile(50))
+
+    def test_merge_needs_same_growth(self):
+        with self.assertRaises(ValueError):
+            Histogram(1.02).merge(Histogram(1.05))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+from harness.wheel import TimingWheel
+
+class TimingWheelTest(unittest.TestCase):
+
+    def setUp(self):
+        # Small wheels so timers cascade through every level: 8 ** 3 ticks
+        self.wheel = TimingWheel(tick=1, slots=8, levels=3)
+        self.fired = []
+
+    def fire(self, name, due):
+        self.fired.append((name, due, self.wheel.now))
+
+    def test_timers_fire_on_their_tick_across_levels(self):
+        rng = random.Random(0)
+        for i in range(2000):
+            # Start some timers mid-turn so deadlines straddle wraps
+            if i % 100 == 0:
+                self.wheel.advance(rng.randrange(1, 20))
+            delay = rng.randrange(1, 400)
+            self.wheel.schedule(delay, self.fire, i, self.wheel.now + delay)
+        self.wheel.advance(512)
+        self.assertEqual(len(self.fired), 2000)
+        self.assertTrue(all(due == now for _, due, now in self.fired))
+        self.assertEqual(self.wheel.pending, 0)
+
+    def test_cancel(self):
+        timers = [self.wheel.schedule(d, self.fire, d, d) for d in range(1, 300)]
+        for timer in timers[::2]:
+            self.wheel.cancel(timer)
+        # Cancelling twice, or after firing, changes nothing
+        self.wheel.cancel(timers[0])
+        self.assertEqual(self.wheel.pending, 149)
+        self.wheel.advance(100)
+        self.wheel.cancel(timers[1])
+        self.wheel.advance(300)
+        self.assertEqual([name for name, _, _ in self.fired], list(range(2, 300, 2)))
+        self.assertEqual(self.wheel.pending, 0)
+
+    def test_callbacks_can_reschedule(self):
+        def again(n):
+            self.fired.append(self.wheel.now)
+            if n:
+                self.wheel.schedule(1, again, n - 1)
+        self.wheel.schedule(1, again, 20)
+        self.wheel.advance(30)
+        self.assertEqual(self.fired, list(range(1, 22)))
+
+    def test_horizon(self):
+        with self.assertRaises(ValueError):
+            self.wheel.schedule(8 ** 3, self.fire, 'late', 0)
+        with self.assertRaises(ValueError):
+            TimingWheel(slots=6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+
+# The active Tracer, None while tracing is off
+_tracer = None
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_SPAN = _NoSpan()
+
+class Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+class Tracer:
+    """Collects spans as Chrome trace events (chrome://tracing, Perfetto).
+
+    Spans are complete ('X') events on this process and thread, so spans
+    opened inside others nest in the viewer. Every span carries the
+    worker pid and its thread's context (the test name, say) on top of
+    its own args. Context is per thread, so background threads such as
+    a session pool don't get tagged with whichever test runs meanwhile.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.local = threading.local()
+        self.origin = time.perf_counter_ns()
+
+    @property
+    def context(self):
+        context = getattr(self.local, 'context', None)
+        if context is None:
+            context = self.local.context = {'worker': os.getpid()}
+        return context
+
+    def span(self, name: str, args: dict):
+        return Span(self, name, args)
+
+    def record(self, name: str, start: int, end: int, args: dict):
+        self.events.append({'name': name, 'ph': 'X',
+                            'ts': (start - self.origin) / 1e3,
+                            'dur': (end - start) / 1e3,
+                            'pid': os.getpid(), 'tid': threading.get_ident(),
+                            'args': dict(self.context, **args)})
+
+    def to_dict(self):
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str):
+        # {pid} in path keeps the files of parallel workers apart
+        if not self.events:
+            return
+        with open(path.format(pid=os.getpid()), 'w') as f:
+            json.dump(self.to_dict(), f)
+
+def enable():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def enabled():
+    return _tracer is not None
+
+def set_context(**context):
+    if _tracer is not None:
+        _tracer.context.update(context)
+
+def span(name: str, **args):
+    """Context manager timing one phase; a shared no-op while tracing is off."""
+    if _tracer is None:
+        return NO_SPAN
+    return _tracer.span(name, args)
+
+def traced(name: str):
+    # Decorator running the whole function in a span
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def merge(paths: list):
+    # Trace files of several workers as one, pids keep them apart
+    events = []
+    for path in paths:
+        with open(path) as f:
+            events.extend(json.load(f)['traceEvents'])
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+def summarize(trace: dict):
+    # Total and count per span name, slowest first
+    totals = {}
+    for e in trace['traceEvents']:
+        total, count = totals.get(e['name'], (0.0, 0))
+        totals[e['name']] = (total + e['dur'], count + 1)
+    return sorted(totals.items(), key=lambda item: -item[1][0])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge and summarize trace files')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-o', '--output', help='write the merged trace here')
+    args = parser.parse_args()
+    trace = merge(args.paths)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(trace, f)
+    print(f'{"span":<22} {"count":>7} {"total ms":>10} {"mean us":>9}')
+    for name, (total, count) in summarize(trace):
+        print(f'{name:<22} {count:>7} {total / 1e3:>10.2f} {total / count:>9.1f}')
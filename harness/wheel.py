@@ -0,0 +1,87 @@
+import math
+
+class Timer:
+    __slots__ = ('deadline', 'callback', 'args', 'slot')
+
+    def __init__(self, deadline: int, callback, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.slot = None
+
+class TimingWheel:
+    """Hierarchical timing wheel driven by simulated time.
+
+    Time advances in ticks of `tick` seconds. Level 0 has one slot per
+    tick; each further level has `slots` slots covering a whole turn of
+    the level below. A timer goes to the lowest level where its deadline
+    shares all higher digits with the current time. When a level wraps,
+    the next level's slot for the new range is emptied into the lower
+    levels. Scheduling and cancelling cost O(levels) and each timer
+    cascades at most `levels` times before it fires, however many timers
+    are pending. Slots are dicts so cancelling is a plain removal.
+    """
+
+    def __init__(self, tick: float=0.01, slots: int=256, levels: int=4):
+        if slots & (slots - 1):
+            raise ValueError('slots must be a power of two')
+        self.tick = tick
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.levels = levels
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.now = 0
+        self.pending = 0
+
+    @property
+    def time(self):
+        return self.now * self.tick
+
+    def schedule(self, delay: float, callback, *args):
+        # callback(*args) runs once `delay` seconds have passed
+        ticks = max(1, math.ceil(delay / self.tick))
+        if ticks >> (self.bits * self.levels):
+            raise ValueError(f'delay {delay}s is beyond the wheel horizon')
+        timer = Timer(self.now + ticks, callback, args)
+        self.place(timer)
+        self.pending += 1
+        return timer
+
+    def place(self, timer: Timer):
+        for level in range(self.levels):
+            shift = self.bits * (level + 1)
+            if timer.deadline >> shift == self.now >> shift:
+                break
+        slot = self.wheels[level][(timer.deadline >> (self.bits * level)) & self.mask]
+        slot[timer] = None
+        timer.slot = slot
+
+    def cancel(self, timer: Timer):
+        if timer.slot is not None and timer.slot.pop(timer, 0) is None:
+            self.pending -= 1
+        timer.slot = None
+
+    def step(self):
+        """Advance one tick and fire the timers due at the new time."""
+        self.now += 1
+        level = 0
+        while level + 1 < self.levels and (self.now >> (self.bits * level)) & self.mask == 0:
+            level += 1
+            slot = self.wheels[level][(self.now >> (self.bits * level)) & self.mask]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self.place(timer)
+        slot = self.wheels[0][self.now & self.mask]
+        while slot:
+            # Callbacks may schedule or cancel, including into this slot
+            timer = next(iter(slot))
+            del slot[timer]
+            timer.slot = None
+            self.pending -= 1
+            timer.callback(*timer.args)
+
+    def advance(self, seconds: float):
+        end = self.now + round(seconds / self.tick)
+        while self.now < end:
+            self.step()
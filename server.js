@@ -7,7 +7,7 @@ import { SessionManager } from './src/session-manager.js'
 const app = express()
 const server = http.Server(app)
 const io = socketio(server)
-const port = 3000
+const port = process.env.PORT || 3000
 
 server.listen(port)
 
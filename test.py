@@ -1,7 +1,117 @@
+import atexit
+import os
 import requests
 import json
+import sys
 import unittest
-import time
+from harness import tracing
+from harness.client import HangmenClient, StateTimeout, check_payload, encode_payload, poll_state
+from harness.engine import Session
+from harness.metrics import Metrics
+from harness.pool import SessionPool
+from harness.replay import TraceRecorder
+from harness.server import ServerProcess
+from harness.snapshot import PlayerSnapshot, SessionSnapshot, alphabet_mask
+from harness.tracing import span, traced
+
+# Shared keep-alive client, reuses connections across helpers
+client = HangmenClient()
+
+def output_path(variable: str):
+    # {pid} in an output path keeps the files of parallel workers apart;
+    # harness/runner.py adds one and merges the files afterwards
+    return os.environ[variable].format(pid=os.getpid())
+
+# Record every call to a JSONL trace, see harness/replay.py
+if os.environ.get('HANGMEN_RECORD'):
+    recorder = TraceRecorder(output_path('HANGMEN_RECORD'))
+    client.observers.append(recorder)
+    atexit.register(recorder.close)
+
+# Per-endpoint latency and size histograms, see harness/metrics.py
+if os.environ.get('HANGMEN_METRICS'):
+    metrics = Metrics()
+    client.observers.append(metrics)
+
+    def export_metrics(path):
+        metrics.add_convergence(client.convergence, client.convergence_timeouts)
+        metrics.export(path)
+
+    atexit.register(export_metrics, output_path('HANGMEN_METRICS'))
+
+# Chrome trace of every check_post phase, see harness/tracing.py
+if os.environ.get('HANGMEN_TRACE'):
+    atexit.register(tracing.enable().export, output_path('HANGMEN_TRACE'))
+
+# Server started by setUpModule unless HANGMEN_URL names a running one
+server = None
+# What the server logged during each test, by test id
+server_logs = {}
+# Active games built between tests for the classes with uses_pool,
+# started by the first of them so runs without those build none
+pool = None
+
+def session_pool():
+    global pool
+    if pool is None:
+        pool = SessionPool(client, int(os.environ.get('HANGMEN_POOL_SIZE', 4)),
+                           background=False)
+        pool.start(wait=False)
+    return pool
+
+def setUpModule():
+    global server
+    if not os.environ.get('HANGMEN_URL'):
+        server = ServerProcess().start()
+        client.base_url = server.url
+        print(f'Server on {server.url} ready in '
+              f'{server.startup_time * 1e3:.0f} ms', file=sys.stderr)
+
+def tearDownModule():
+    if pool is not None:
+        pool.close()
+        r = pool.report()
+        print(f'Session pool built {r["built"]} games in {r["setup_total"]:.2f}s '
+              f'(p50 {r["setup"]["p50"] * 1e3:.1f} ms each), tests waited '
+              f'{r["waited"]:.3f}s for them', file=sys.stderr)
+    if server is not None:
+        server.stop()
+    if client.convergence_timeouts:
+        print(f'{client.convergence_timeouts} state waits timed out, '
+              f'{client.convergence.count} converged', file=sys.stderr)
+    log_dir = os.environ.get('HANGMEN_SERVER_LOGS')
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        for test_id, output in server_logs.items():
+            with open(os.path.join(log_dir, test_id + '.log'), 'w') as f:
+                f.write(output)
+
+class ServerTestCase(unittest.TestCase):
+    # Server sources whose behaviour the tests check, besides server.js,
+    # for incremental runs (harness/selection.py). Imports are not
+    # followed, so list every module that matters. None means all of src.
+    server_modules = None
+    # Whether the tests take games from the session pool
+    uses_pool = False
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.uses_pool:
+            session_pool()
+
+    def setUp(self):
+        tracing.set_context(test=self.id())
+        if self.uses_pool:
+            # Refill between tests rather than during them
+            self.addCleanup(pool.top_up)
+        if server is not None:
+            if pool is not None:
+                # Pool requests would show up in this test's server log
+                pool.settle()
+            self.addCleanup(self.collect_server_output, server.mark())
+
+    def collect_server_output(self, mark: int):
+        server_logs[self.id()] = server.output_since(mark)
 
 # Helper functions
 def new_session(test: unittest.TestCase):
@@ -49,61 +159,81 @@ def reset_session(test: unittest.TestCase,
     json = {'sid': sid}
     return check_post(test, 'reset-session', json=json)
 
+def wait_for_state(test: unittest.TestCase,
+                   sid: str,
+                   predicate,
+                   timeout: float=1.0):
+    # Poll get-state until predicate holds. On timeout hand back the
+    # last state so the following checks report what differs; the
+    # timeout is counted and reported at exit.
+    try:
+        state, elapsed = poll_state(lambda sid: get_state(test, sid),
+                                    sid, predicate, timeout)
+    except StateTimeout as e:
+        client.convergence_timeouts += 1
+        return e.state
+    client.convergence.add(elapsed)
+    return state
+
+def state_matches(turnOrder: list=None,
+                  guessedLetters: str=None,
+                  isLobby: bool=None):
+    def predicate(state: dict):
+        if turnOrder is not None and state['turnOrder'] != turnOrder:
+            return False
+        if guessedLetters is not None:
+            guessed = {c for c, v in state['alphabet']['letters'].items() if v}
+            if guessed != set(guessedLetters):
+                return False
+        return isLobby is None or state['isLobby'] == isLobby
+    return predicate
+
 def check_post(test: unittest.TestCase,
                post_type: str,
                json: dict=None):
-    res, content_type = None, None
-    if post_type == 'new-session':
-        assert(json is None)
-        content_type = 'text/html'
-    elif post_type == 'join-session':
-        assert(json is not None and 'sid' in json 
-               and 'name' in json)
-        content_type = 'text/html'
-    elif post_type == 'get-state':
-        assert(json is not None and 'sid' in json)
-        content_type = 'application/json'
-    elif post_type == 'set-word':
-        assert(json is not None and 'sid' in json 
-               and 'pid' in json and 'word' in json)
-    elif post_type == 'guess-letter':
-        assert(json is not None and 'sid' in json 
-               and 'letter' in json)
-    elif post_type == 'guess-word':
-        assert (json is not None and 'sid' in json
-                and 'pid' in json and 'word' in json)
-    elif post_type == 'exit-session':
-        assert (json is not None and 'sid' in json
-                and 'pid' in json)
-    elif post_type == 'reset-session':
-        assert (json is not None and 'sid' in json)
-    else:
-        raise ValueError()
-    res = requests.post(f'http://localhost:3000/{post_type}', json=json)
-    return check_response(test, res, content_type)
+    with span(post_type, sid=json and json.get('sid')):
+        with span('payload'):
+            content_type = check_payload(post_type, json)
+        with span('encode'):
+            body = encode_payload(json)
+        with span('network'):
+            res = client.post(post_type, json=json, body=body)
+        return check_response(test, res, content_type)
 
 def check_response(test: unittest.TestCase,
                     res: requests.Response,
                     content_type:str=None):
     res_data = None
     if content_type is None:
-        test.assertNotIn('Content-Type', res.headers)
+        with span('headers'):
+            test.assertNotIn('Content-Type', res.headers)
     else:
-        test.assertIn('Content-Type', res.headers)
-        test.assertEqual(res.headers['Content-Type'], content_type+'; charset=utf-8')
-        test.assertNotEqual(len(res.text), 0)
-        if content_type == 'text/html':
-            res_data = res.text
-        elif content_type == 'application/json':
-            res_data = res.json()
-        else:
-            raise ValueError()
+        with span('headers'):
+            test.assertIn('Content-Type', res.headers)
+            test.assertEqual(res.headers['Content-Type'], content_type+'; charset=utf-8')
+        with span('decode'):
+            test.assertNotEqual(len(res.text), 0)
+            if content_type == 'text/html':
+                res_data = res.text
+            elif content_type == 'application/json':
+                res_data = res.json()
+            else:
+                raise ValueError()
     return res_data
     
+@traced('check_session_state')
 def check_session_state(test: unittest.TestCase, 
-                        state: dict, sid:str=None, players:list=[],
+                        state, sid:str=None, players:list=[],
                         turnOrderContains:list=None, turnOrder:list=None,
-                        guessedLetters:str='', isLobby:bool=True):
+                        guessedLetters:str='', isLobby:bool=True,
+                        model: Session=None):
+
+    # Derive expectations from the reference model when given one
+    if model is not None:
+        players = list(model.players)
+        turnOrder, turnOrderContains = model.turn_order, None
+        guessedLetters = model.alphabet.guessed()
+        isLobby = model.is_lobby
 
     # First check consistency of input
     assert(not ((turnOrderContains is not None) and ((turnOrder is not None))))
@@ -114,42 +244,56 @@ def check_session_state(test: unittest.TestCase,
             assert(len(turnOrder) == 0)
         assert(len(guessedLetters) == 0)
 
+    # Checks run on a snapshot; raw states are converted once
+    if not isinstance(state, SessionSnapshot):
+        for attr in ['id', 'players', 'turnOrder', 'alphabet', 'isLobby']:
+            test.assertIn(attr, state)
+        test.assertLessEqual(set('abcdefghjiklmnopqrstuvwxyz'),
+                             state['alphabet']['letters'].keys())
+        state = SessionSnapshot.from_state(state)
+
     # Run equality check on state using input
-    for attr in ['id', 'players', 'turnOrder', 'alphabet', 'isLobby']:
-        test.assertIn(attr, state)
     if sid is not None:
-        test.assertEqual(state['id'], sid)
-    test.assertEqual(len(state['players']), len(players))
+        test.assertEqual(state.sid, sid)
+    test.assertEqual(len(state.players), len(players))
+    pids = state.pids
     for pid in players: 
-        test.assertIn(pid, state['players'])
+        test.assertIn(pid, pids)
     # Cannot check ACTUAL turn order (since it is shuffled)
     # only check if they both contain same elements
     if turnOrderContains is not None:
         for pid in turnOrderContains:
-            test.assertIn(pid, state['turnOrder'])
+            test.assertIn(pid, state.turn_order)
     if turnOrder is not None:
-        test.assertEqual(state['turnOrder'], turnOrder)
-    for c in 'abcdefghjiklmnopqrstuvwxyz':
-        test.assertIn(c, state['alphabet']['letters'])
-        if c in guessedLetters:
-            test.assertTrue(state['alphabet']['letters'][c])
-        else:
-            test.assertFalse(state['alphabet']['letters'][c])
-    test.assertEqual(state['isLobby'], isLobby)
-
+        test.assertEqual(state.turn_order, turnOrder)
+    # Whole alphabet in one comparison
+    test.assertEqual((state.alphabet, state.extra), alphabet_mask(guessedLetters),
+                     f'guessed {state.guessed()!r}, expected {guessedLetters!r}')
+    test.assertEqual(state.is_lobby, isLobby)
+    if model is not None:
+        for pid, player in model.players.items():
+            check_player_state(test, state.player(pid),
+                               pid=pid, name=player.name,
+                               word=player.word, ready=player.ready,
+                               alive=player.alive)
+
+@traced('check_player_state')
 def check_player_state(test: unittest.TestCase,
-                       state: dict, pid: str, name: str,
+                       state, pid: str, name: str,
                        word:str='', ready:bool=False, alive:bool=True):
-    for attr in ['id', 'name', 'word', 'ready', 'alive']:
-        test.assertIn(attr, state)
+    if not isinstance(state, PlayerSnapshot):
+        for attr in ['id', 'name', 'word', 'ready', 'alive']:
+            test.assertIn(attr, state)
+        state = PlayerSnapshot.from_state(state)
     if pid is not None:
-        test.assertEqual(state['id'], pid)
-    test.assertEqual(state['word'], word)
-    test.assertEqual(state['ready'], ready)
-    test.assertEqual(state['alive'], alive)
+        test.assertEqual(state.pid, pid)
+    test.assertEqual(state.word, word)
+    test.assertEqual(state.ready, ready)
+    test.assertEqual(state.alive, alive)
+
+class TestNewSession(ServerTestCase):
+    server_modules = ('src/session-manager.js', 'src/session.js', 'src/alphabet.js', 'src/pin.js')
 
-class TestNewSession(unittest.TestCase):
-    
     def test_create(self):
         # Create new session
         sid = new_session(self)
@@ -160,9 +304,11 @@ class TestNewSession(unittest.TestCase):
         # Check session state
         check_session_state(self, session_state, sid)
 
-class TestJoinSession(unittest.TestCase):
+class TestJoinSession(ServerTestCase):
+    server_modules = ('src/session-manager.js', 'src/session.js', 'src/player.js', 'src/pin.js')
 
     def setUp(self):
+        super().setUp()
         self.sid = check_post(self, 'new-session')
 
     def test_single_join_session(self):
@@ -207,7 +353,7 @@ class TestJoinSession(unittest.TestCase):
         set_word(self, self.sid, pids[0], words[0])
         set_word(self, self.sid, pids[1], words[1])
 
-        time.sleep(0.05)
+        wait_for_state(self, self.sid, state_matches(isLobby=False))
 
         # Session now active,
         # Last player joins
@@ -228,9 +374,11 @@ class TestJoinSession(unittest.TestCase):
                                pid=pid, name=name,
                                word=word, ready=ready)
 
-class TestSetWord(unittest.TestCase):
-    
+class TestSetWord(ServerTestCase):
+    server_modules = ('src/session-manager.js', 'src/session.js', 'src/player.js')
+
     def setUp(self):
+        super().setUp()
         self.sid = check_post(self, 'new-session')
 
         self.names = ['name1', 'name2', 'name3']
@@ -244,11 +392,9 @@ class TestSetWord(unittest.TestCase):
 
         set_word(self, self.sid, self.pids[0], self.words[0])
 
-        # Allow server to update
-        time.sleep(0.05)
-
         # Get session state
-        session_state = get_state(self, self.sid) 
+        session_state = wait_for_state(self, self.sid,
+            lambda s: s['players'][self.pids[0]]['ready'])
 
         # Check session state
         check_session_state(self, session_state, sid=self.sid,
@@ -272,11 +418,9 @@ class TestSetWord(unittest.TestCase):
         for i in range(2):
             set_word(self, self.sid, self.pids[i], self.words[i])
 
-        # Allow server to update
-        time.sleep(0.05)
-
         # Get session state
-        session_state = get_state(self, self.sid)
+        session_state = wait_for_state(self, self.sid,
+            lambda s: all(s['players'][pid]['ready'] for pid in self.pids[:2]))
 
         # Check session state
         check_session_state(self, session_state, sid=self.sid,
@@ -303,11 +447,8 @@ class TestSetWord(unittest.TestCase):
         for i in range(3):
             set_word(self, self.sid, self.pids[i], self.words[i])
 
-        # Allow server to update
-        time.sleep(0.05)
-
         # Get session state
-        session_state = get_state(self, self.sid)
+        session_state = wait_for_state(self, self.sid, state_matches(isLobby=False))
 
         # Check session state
         check_session_state(self, session_state, sid=self.sid,
@@ -322,268 +463,145 @@ class TestSetWord(unittest.TestCase):
                                pid=pid, name=name,
                                word=word, ready=True)
 
-class TestGuessLetter(unittest.TestCase):
+class TestGuessLetter(ServerTestCase):
+    server_modules = ('src/session-manager.js', 'src/session.js', 'src/alphabet.js', 'src/player.js')
+    uses_pool = True
 
     def setUp(self):
+        super().setUp()
+
+        # Take an active game (banana, apple, cashew) from the pool
+        session = pool.take()
+        self.sid, self.pids = session['sid'], session['pids']
+        self.names, self.words = session['names'], session['words']
+
+        # Model follows the server from its shuffled turn order on
+        self.model = Session.from_state(session['state'])
+
+    def guess_letters(self, letters: str):
+        for c in letters:
+            guess_letter(self, self.sid, c)
+            self.model.guess_letter(c)
+        return wait_for_state(self, self.sid,
+            state_matches(turnOrder=self.model.turn_order,
+                          guessedLetters=self.model.alphabet.guessed()))
 
-        # Set up active game
-        self.sid = new_session(self)
-        self.pids = [None] * 3
-        self.names = ['name' + str(i) for i in range(1,4)]
-        self.words = ['banana', 'apple', 'cashew']
-        for i in range(3):
-            self.pids[i] = join_session(self, self.sid, self.names[i])
-        for i in range(3):
-            set_word(self, self.sid, self.pids[i], self.words[i])
-        self.turnOrder = None
-        
     def test_guess_letter_single_turn(self):
 
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        # Update turnOrder to eventual state
-        turnOrder = turnOrder[1:] + turnOrder[:1]
-        
         # Single letter
-        guess_letter(self, self.sid, 'a')
-
-        time.sleep(0.05)
+        session_state = self.guess_letters('a')
 
-        # Check session state
-        session_state = get_state(self, self.sid)
+        # Check session and player states (all alive)
         check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids, 
-                            turnOrder=turnOrder,
-                            guessedLetters='a',
-                            isLobby=False)
-
-        # Check player states
-        for pid, name, word in zip(self.pids, self.names, self.words):
-            player_state = session_state['players'][pid] 
-            check_player_state(self, player_state, 
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=True)
+                            model=self.model)
+        for pid in self.pids:
+            self.assertTrue(session_state['players'][pid]['alive'])
 
     def test_guess_letter_multiple_turns(self):
-        
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        # Update turnOrder to eventual state 
-        for _ in range(3):
-            turnOrder = turnOrder[1:] + turnOrder[:1]
 
         # Guess letter 3 times
-        for c in 'abc':
-            guess_letter(self, self.sid, c)
+        session_state = self.guess_letters('abc')
 
-        time.sleep(0.05)
-
-        # Check session state
-        session_state = get_state(self, self.sid)
+        # Check session and player states (all alive)
         check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids,
-                            turnOrder=turnOrder,
-                            guessedLetters='abc',
-                            isLobby=False)
-
-        # Check player states (all alive)
-        for pid, name, word in zip(self.pids, self.names, self.words):
-            player_state = session_state['players'][pid]
-            check_player_state(self, player_state,
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=True)
+                            model=self.model)
+        for pid in self.pids:
+            self.assertTrue(session_state['players'][pid]['alive'])
 
     def test_guess_letter_multiple_turns_duplicate(self):
 
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        # Update turnOrder to eventual state 
-        for _ in range(3):
-            turnOrder = turnOrder[1:] + turnOrder[:1]
-
         # Guess letter 4 times, but only 3 should be processed
-        for c in 'abbc':
-            guess_letter(self, self.sid, c)
-
-        time.sleep(0.05)
+        session_state = self.guess_letters('abbc')
+        self.assertEqual(self.model.alphabet.guessed(), 'abc')
 
-        # Check session state
-        session_state = get_state(self, self.sid)
+        # Check session and player states (all alive)
         check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids,
-                            turnOrder=turnOrder,
-                            guessedLetters='abc',
-                            isLobby=False)
-
-        # Check player states (all alive)
-        for pid, name, word in zip(self.pids, self.names, self.words):
-            player_state = session_state['players'][pid]
-            check_player_state(self, player_state,
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=True)
+                            model=self.model)
+        for pid in self.pids:
+            self.assertTrue(session_state['players'][pid]['alive'])
 
     def test_guess_letter_multiple_turns_kill(self):
-        
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        # Update turnOrder to eventual state 
-        for _ in range(2):
-            turnOrder = turnOrder[1:] + turnOrder[:1]
-        turnOrder.remove(self.pids[0]) # We kill player, increment turn
-        for _ in range(3):
-            turnOrder = turnOrder[1:] + turnOrder[:1]
-        turnOrder.remove(self.pids[1]) 
+
         # Guess letter 6 times
-        for c in 'banple':
-            guess_letter(self, self.sid, c)
-            
-        time.sleep(0.05)
+        session_state = self.guess_letters('banple')
 
-        # Check session state
-        session_state = get_state(self, self.sid)
+        # Check session and player states (first two dead)
         check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids,
-                            turnOrder=turnOrder,
-                            guessedLetters='banple',
-                            isLobby=False)
-
-        # Check player states (first dead)
+                            model=self.model)
         alives = [False, False, True]
-        for pid, name, word, alive in zip(self.pids, self.names,
-                                   self.words, alives):
-            player_state = session_state['players'][pid]
-            check_player_state(self, player_state,
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=alive)
+        for pid, alive in zip(self.pids, alives):
+            self.assertEqual(session_state['players'][pid]['alive'], alive)
+        self.assertEqual(session_state['turnOrder'], self.pids[2:])
 
     def test_guess_letter_multiple_turns_win(self):
-        
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        # Update turnOrder to eventual state 
-        for _ in range(2):
-            turnOrder = turnOrder[1:] + turnOrder[:1]
-        turnOrder.remove(self.pids[0]) # We kill player 1
-        turnOrder = turnOrder[1:] + turnOrder[:1]
 
-        # Guess letter 4 times, but only 3 should be processed
-        for c in 'ban':
-            guess_letter(self, self.sid, c)
-            
-        time.sleep(0.05)
+        # Guess letter 3 times, killing the first player
+        session_state = self.guess_letters('ban')
 
-        # Check session state
-        session_state = get_state(self, self.sid)
+        # Check session and player states (first dead)
         check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids,
-                            turnOrder=turnOrder,
-                            guessedLetters='ban',
-                            isLobby=False)
-
-        # Check player states (first dead)
+                            model=self.model)
         alives = [False, True, True]
-        for pid, name, word, alive in zip(self.pids, self.names,
-                                   self.words, alives):
-            player_state = session_state['players'][pid]
-            check_player_state(self, player_state,
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=alive)
+        for pid, alive in zip(self.pids, alives):
+            self.assertEqual(session_state['players'][pid]['alive'], alive)
+
+class TestGuessWord(ServerTestCase):
+    server_modules = ('src/session-manager.js', 'src/session.js', 'src/player.js')
+    uses_pool = True
 
-class TestGuessWord(unittest.TestCase):
-    
     def setUp(self):
-        
-        # Set up active game
-        self.sid = new_session(self)
-        self.pids = [None] * 3
-        self.names = ['name' + str(i) for i in range(1,4)]
-        self.words = ['banana', 'apple', 'cashew']
-        for i in range(3):
-            self.pids[i] = join_session(self, self.sid, self.names[i])
-        for i in range(3):
-            set_word(self, self.sid, self.pids[i], self.words[i])
-        self.turnOrder = None
+        super().setUp()
+
+        # Take an active game (banana, apple, cashew) from the pool
+        session = pool.take()
+        self.sid, self.pids = session['sid'], session['pids']
+        self.names, self.words = session['names'], session['words']
+
+        # Model follows the server from its shuffled turn order on
+        self.model = Session.from_state(session['state'])
+
+    def guess_word(self, target: str, word: str):
+        guess_word(self, self.sid, target, word)
+        self.model.guess_word(target, word)
+        return wait_for_state(self, self.sid,
+            state_matches(turnOrder=self.model.turn_order))
 
     def test_guess_word_success(self):
 
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        guesser = turnOrder[0] # grab current player
-        guesser_idx = self.pids.index(turnOrder[0]) 
-        target = [pid for pid in self.pids if pid != guesser][0] # pick target
+        # Pick a target other than the current player
+        guesser = self.model.current_pid()
+        target = [pid for pid in self.pids if pid != guesser][0]
         target_idx = self.pids.index(target)
-        # Update turnOrder to eventual state
-        turnOrder.remove(target)
-        turnOrder = turnOrder[1:] + turnOrder[:1]
-        
-        # Guess third player's word successfully
-        guess_word(self, self.sid, target, self.words[target_idx])
 
-        time.sleep(0.05)
+        # Guess target's word successfully
+        session_state = self.guess_word(target, self.words[target_idx])
 
-        # Check session state 
-        session_state = get_state(self, self.sid) 
+        # Check session and player states (target dead)
         check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids, 
-                            turnOrder=turnOrder,
-                            guessedLetters='',
-                            isLobby=False)
-
-        # Check player states
+                            model=self.model)
         alives = [i != target_idx for i in range(3)]
-        for pid, name, word, alive in zip(self.pids, self.names, 
-                                          self.words, alives):
-            player_state = session_state['players'][pid]
-            check_player_state(self, player_state, 
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=alive)
+        for pid, alive in zip(self.pids, alives):
+            self.assertEqual(session_state['players'][pid]['alive'], alive)
+        self.assertNotIn(target, session_state['turnOrder'])
+        self.assertNotEqual(session_state['turnOrder'][0], guesser)
 
     def test_guess_word_fail(self):
-    
-        # Get turnOrder
-        session_state = get_state(self, self.sid)
-        turnOrder = session_state['turnOrder']
-        guesser = turnOrder[0] # grab current player
-        guesser_idx = self.pids.index(turnOrder[0]) 
-        target = [pid for pid in self.pids if pid != guesser][0] # pick target
-        target_idx = self.pids.index(target)
-        # Update turnOrder to eventual state
-        turnOrder.remove(guesser)
-        
-        # Guess third player's word successfully
-        guess_word(self, self.sid, target, 'incorrect')
 
-        time.sleep(0.05)
+        # Pick a target other than the current player
+        guesser = self.model.current_pid()
+        guesser_idx = self.pids.index(guesser)
+        target = [pid for pid in self.pids if pid != guesser][0]
 
-        # Check session state 
-        session_state = get_state(self, self.sid) 
-        check_session_state(self, session_state, sid=self.sid,
-                            players=self.pids, 
-                            turnOrder=turnOrder,
-                            guessedLetters='',
-                            isLobby=False)
+        # Guess target's word incorrectly
+        session_state = self.guess_word(target, 'incorrect')
 
-        # Check player states
+        # Check session and player states (guesser dead)
+        check_session_state(self, session_state, sid=self.sid,
+                            model=self.model)
         alives = [i != guesser_idx for i in range(3)]
-        for pid, name, word, alive in zip(self.pids, self.names, 
-                                          self.words, alives):
-            player_state = session_state['players'][pid]
-            check_player_state(self, player_state, 
-                               pid=pid, name=name,
-                               word=word, ready=True,
-                               alive=alive)
+        for pid, alive in zip(self.pids, alives):
+            self.assertEqual(session_state['players'][pid]['alive'], alive)
+        self.assertNotIn(guesser, session_state['turnOrder'])
 
 if __name__ == '__main__':
     unittest.main()